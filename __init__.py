@@ -1,19 +1,56 @@
 """凯迪仕门锁集成主文件"""
 
 import logging
+import time
+from datetime import timedelta
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
+from .const import (
+    DOMAIN,
+    DATA_KEY_STATUS,
+    DATA_ANOMALY,
+    DATA_FLEET,
+    DATA_PRESENCE,
+    CONF_USER_MAPPING,
+    SIGNAL_NEW_RECORDS,
+    CIRCUIT_BREAKER_THRESHOLD,
+    CIRCUIT_BREAKER_INTERVAL,
+    DEFAULT_SCAN_INTERVAL,
+    METRIC_POLLS,
+    METRIC_UNCHANGED,
+    METRIC_NOT_MODIFIED,
+    METRIC_FANOUT_SKIPPED,
+)
+from .anomaly import async_get_anomaly_detector
+from .commands import KaadasCommandQueue
+from .export import async_register_export_service
+from .fleet import async_get_fleet
 from .kaadas_api import KaadasAPI
+from .metrics import EventCounter, KaadasMetricsView, LatencyHistogram
+from .presence import async_get_presence
+from .profiler import async_register_profile_service
+from .records import KaadasRecordBuffer
+from .state_machine import KaadasLockStateMachine
+from .websocket import async_register_websocket_commands
 
 _LOGGER = logging.getLogger(__name__)
 
-DOMAIN = "kaadas_lock"
-DATA_KEY_STATUS = "status"
+PLATFORMS = ["binary_sensor", "device_tracker", "lock", "sensor"]
 
-PLATFORMS = ["binary_sensor", "sensor"]
+async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+    """设置集成"""
+    async_register_websocket_commands(hass)
+    hass.http.register_view(KaadasMetricsView())
+    async_register_export_service(hass)
+    async_register_profile_service(hass)
+    
+    return True
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """设置配置项"""
@@ -21,13 +58,37 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     wifi_sn = entry.data.get("wifi_sn")
     uid = entry.data.get("uid")
     
-    api = KaadasAPI(token, wifi_sn, uid)
+    # 接口返回的操作时间不带时区，按 Home Assistant 配置的时区解释
+    api = KaadasAPI(
+        token,
+        wifi_sn,
+        uid,
+        session=async_get_clientsession(hass),
+        time_zone=dt_util.get_time_zone(hass.config.time_zone),
+    )
     
     coordinator = KaadasDataUpdateCoordinator(hass, api)
     await coordinator.async_config_entry_first_refresh()
     
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     
+    # 汇总统计随每次刷新增量更新，首次刷新的结果立即计入
+    # 用户映射每次从配置项读取，选项流程中的修改无需重新加载即可生效
+    fleet = async_get_fleet(hass)
+    fleet.async_update_lock(coordinator, entry.data.get(CONF_USER_MAPPING, {}))
+    entry.async_on_unload(
+        coordinator.async_add_listener(
+            lambda: fleet.async_update_lock(coordinator, entry.data.get(CONF_USER_MAPPING, {}))
+        )
+    )
+    
+    # 在家状态由后续新增记录驱动，首次刷新已保留的记录在此补入
+    presence = async_get_presence(hass)
+    presence.async_register_lock(entry, wifi_sn)
+    presence.async_add_records(wifi_sn, coordinator.records)
+    # 选项流程修改用户映射时不会重新加载配置项，在此重建索引
+    entry.async_on_unload(entry.add_update_listener(async_update_presence_index))
+    
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     
     return True
@@ -37,10 +98,34 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        domain_data = hass.data[DOMAIN]
+        coordinator = domain_data.pop(entry.entry_id)
+        
+        fleet = domain_data.get(DATA_FLEET)
+        if fleet is not None:
+            fleet.async_remove_lock(coordinator.api.wifi_sn)
+            fleet.async_release(entry.entry_id)
+        
+        presence = domain_data.get(DATA_PRESENCE)
+        if presence is not None:
+            presence.async_remove_lock(entry.entry_id, coordinator.api.wifi_sn)
+        
+        # 最后一把门锁卸载后释放共享数据
+        if not any(isinstance(value, KaadasDataUpdateCoordinator) for value in domain_data.values()):
+            for key in (DATA_ANOMALY, DATA_FLEET, DATA_PRESENCE):
+                shared = domain_data.pop(key, None)
+                if shared is not None:
+                    shared.async_shutdown()
     
     return unload_ok
 
+async def async_update_presence_index(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """配置项更新后按新的用户映射重建在家状态索引"""
+    domain_data = hass.data[DOMAIN]
+    presence = domain_data.get(DATA_PRESENCE)
+    if presence is not None:
+        presence.async_register_lock(entry, domain_data[entry.entry_id].api.wifi_sn)
+
 class KaadasDataUpdateCoordinator(DataUpdateCoordinator):
     """数据更新协调器"""
     
@@ -50,17 +135,96 @@ class KaadasDataUpdateCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=30),
+            update_interval=timedelta(seconds=DEFAULT_SCAN_INTERVAL),
         )
         self.api = api
         self.entities = []
+        # 近期记录(受内存预算约束)及本次刷新新增的记录
+        self.records = KaadasRecordBuffer()
+        self.new_records = []
+        # 由新增记录驱动的门锁状态
+        self.lock_state = KaadasLockStateMachine()
+        self.metrics = {METRIC_FANOUT_SKIPPED: 0}
+        self.commands = KaadasCommandQueue(self)
+        self.anomaly = async_get_anomaly_detector(hass)
+        self._skip_fanout = False
+        # 指标：轮询耗时、按类型与结果统计的记录数、熔断状态
+        self.poll_latency = LatencyHistogram()
+        self.event_counts = EventCounter()
+        self.breaker_open = False
+        self._consecutive_failures = 0
+    
+    @property
+    def skip_rate(self) -> float:
+        """返回因响应未变化而跳过处理的轮询比例"""
+        metrics = self.api.metrics
+        if not metrics[METRIC_POLLS]:
+            return 0.0
+        return (metrics[METRIC_UNCHANGED] + metrics[METRIC_NOT_MODIFIED]) / metrics[METRIC_POLLS]
     
     async def _async_update_data(self):
         """更新数据"""
+        self._skip_fanout = False
+        self.new_records = []
+        previous = self.data.get(DATA_KEY_STATUS) if self.data else None
+        started = time.monotonic()
         try:
             status = await self.api.async_get_lock_status()
-            return {
-                DATA_KEY_STATUS: status
-            }
         except Exception as e:
-            raise UpdateFailed(f"更新门锁状态失败: {e}")    
\ No newline at end of file
+            self._async_record_failure()
+            raise UpdateFailed(f"更新门锁状态失败: {e}")
+        finally:
+            self.poll_latency.observe(time.monotonic() - started)
+        
+        if not self.api.last_request_ok:
+            # 接口返回的是占位状态，保留上一次的数据并将实体标记为不可用
+            self._async_record_failure()
+            raise UpdateFailed(f"更新门锁状态失败: {status.get('last_text')}")
+        self._async_record_success()
+
+        if previous is not None and status is previous:
+            # 响应未变化：沿用原数据，且在可用性未变化时跳过监听器通知
+            self._skip_fanout = self.last_update_success
+            return self.data
+        
+        self.new_records = self.records.ingest(status.pop("records", ()))
+        for record in self.new_records:
+            self.lock_state.feed(record)
+        if self.new_records:
+            self.anomaly.async_add_records(self.api.wifi_sn, self.new_records)
+            async_dispatcher_send(self.hass, SIGNAL_NEW_RECORDS, self.api.wifi_sn, self.new_records)
+            self.event_counts.add(self.new_records)
+        
+        return {
+            DATA_KEY_STATUS: status
+        }
+    
+    @callback
+    def _async_record_success(self) -> None:
+        """请求成功，关闭熔断并恢复轮询间隔"""
+        self._consecutive_failures = 0
+        if self.breaker_open:
+            self.breaker_open = False
+            self.update_interval = timedelta(seconds=DEFAULT_SCAN_INTERVAL)
+            _LOGGER.info("门锁 %s 请求恢复，轮询间隔恢复为 %s 秒", self.api.wifi_sn, DEFAULT_SCAN_INTERVAL)
+    
+    @callback
+    def _async_record_failure(self) -> None:
+        """请求失败，连续失败达到阈值时熔断并放慢轮询"""
+        self._consecutive_failures += 1
+        if not self.breaker_open and self._consecutive_failures >= CIRCUIT_BREAKER_THRESHOLD:
+            self.breaker_open = True
+            self.update_interval = timedelta(seconds=CIRCUIT_BREAKER_INTERVAL)
+            _LOGGER.warning(
+                "门锁 %s 连续 %s 次请求失败，轮询间隔放慢为 %s 秒",
+                self.api.wifi_sn, self._consecutive_failures, CIRCUIT_BREAKER_INTERVAL,
+            )
+    
+    @callback
+    def async_update_listeners(self) -> None:
+        """通知监听器，响应未变化时直接跳过"""
+        if self._skip_fanout:
+            self._skip_fanout = False
+            self.metrics[METRIC_FANOUT_SKIPPED] += 1
+            return
+        super().async_update_listeners()
@@ -0,0 +1,308 @@
+"""凯迪仕门锁记录异常检测"""
+
+import logging
+from typing import Dict, List, Tuple
+
+import numpy as np
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_ANOMALY,
+    EVENT_ANOMALY,
+    SIGNAL_ANOMALY,
+    ANOMALY_THRESHOLD,
+    ANOMALY_MIN_HISTORY,
+    ANOMALY_SMOOTHING,
+    ANOMALY_MAX_AGE,
+    ANOMALY_BATCH_DELAY,
+    ALARM_BURST_TYPES,
+    ALARM_BURST_COUNT,
+    ALARM_BURST_WINDOW,
+    MECHANICAL_KEY_TYPE,
+    UNLOCK_OPERATION_TYPES,
+    RESULT_SUCCESS,
+)
+from .records import KaadasRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+HOURS_PER_WEEK = 168
+
+# 对数间隔方差下限，避免作息极规律的用户因很小的偏差被判为异常
+MIN_GAP_VARIANCE = 1.0
+
+# 异常原因，按评分分量的顺序排列
+REASON_HOUR = "unusual_hour"
+REASON_INTERVAL = "unusual_interval"
+REASON_MECHANICAL_KEY = "mechanical_key"
+REASON_ALARM_BURST = "alarm_burst"
+REASONS = (REASON_HOUR, REASON_INTERVAL, REASON_MECHANICAL_KEY, REASON_ALARM_BURST)
+
+@callback
+def async_get_anomaly_detector(hass: HomeAssistant) -> "KaadasAnomalyDetector":
+    """返回全部门锁共享的异常检测器"""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_ANOMALY not in domain_data:
+        domain_data[DATA_ANOMALY] = KaadasAnomalyDetector(hass)
+    return domain_data[DATA_ANOMALY]
+
+def _grow(array: np.ndarray, rows: int) -> np.ndarray:
+    """将数组第一维扩展到指定行数，新增行填0"""
+    if array.shape[0] >= rows:
+        return array
+    padding = np.zeros((rows - array.shape[0],) + array.shape[1:], dtype=array.dtype)
+    return np.concatenate((array, padding))
+
+class KaadasAnomalyDetector:
+    """全部门锁共享的异常检测器
+
+    按门锁、按用户维护周内小时直方图和开锁间隔统计(NumPy 数组)。
+    各门锁的新记录先汇总成批，整批向量化评分后再更新统计。
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """初始化检测器"""
+        self.hass = hass
+        self._locks: Dict[str, int] = {}
+        # 用户名只在单把门锁内有意义，不同门锁上的同名用户分别统计
+        self._users: Dict[Tuple[str, str], int] = {}
+        self._pending: List[Tuple[str, KaadasRecord]] = []
+        self._unsub_flush = None
+
+        # 门锁统计：开锁时段直方图、机械钥匙次数、最近的报警时间戳
+        self._lock_hist = np.zeros((0, HOURS_PER_WEEK))
+        self._lock_key_count = np.zeros(0)
+        self._lock_alarms = np.zeros((0, ALARM_BURST_COUNT))
+
+        # 用户统计：开锁时段直方图、最后开锁时间、对数间隔的均值与平方差和(Welford)
+        self._user_hist = np.zeros((0, HOURS_PER_WEEK))
+        self._user_last = np.zeros(0)
+        self._user_gap_n = np.zeros(0)
+        self._user_gap_mean = np.zeros(0)
+        self._user_gap_m2 = np.zeros(0)
+
+    @callback
+    def async_add_records(self, wifi_sn: str, records: List[KaadasRecord]) -> None:
+        """加入一把门锁的新增记录，稍后与其他门锁的记录一起评分"""
+        self._pending.extend((wifi_sn, record) for record in records)
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(self.hass, ANOMALY_BATCH_DELAY, self._async_flush)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """取消待执行的批处理"""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+
+    @callback
+    def _async_flush(self, _now=None) -> None:
+        """对累积的记录评分并发出异常事件"""
+        self._unsub_flush = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        utc_offset = dt_util.now().utcoffset()
+        offset = utc_offset.total_seconds() if utc_offset else 0
+
+        for anomaly in self.process(batch, offset, dt_util.utcnow().timestamp()):
+            _LOGGER.info("检测到门锁异常: %s", anomaly)
+            self.hass.bus.async_fire(EVENT_ANOMALY, anomaly)
+            async_dispatcher_send(self.hass, SIGNAL_ANOMALY.format(anomaly["wifi_sn"]), anomaly)
+
+    def process(
+        self, batch: List[Tuple[str, KaadasRecord]], utc_offset: float, now: float
+    ) -> List[Dict]:
+        """对一批记录评分并更新统计，返回超过阈值的异常"""
+        size = len(batch)
+
+        for wifi_sn, record in batch:
+            self._locks.setdefault(wifi_sn, len(self._locks))
+            if record.user:
+                self._users.setdefault((wifi_sn, record.user), len(self._users))
+        self._ensure_capacity()
+
+        lock = np.fromiter((self._locks[wifi_sn] for wifi_sn, _ in batch), np.intp, size)
+        user = np.fromiter(
+            (self._users.get((wifi_sn, record.user), -1) for wifi_sn, record in batch), np.intp, size
+        )
+        ts = np.fromiter((record.timestamp for _, record in batch), np.float64, size)
+        op = np.fromiter((record.operation_type for _, record in batch), np.intp, size)
+        ok = np.fromiter((record.operation_result == RESULT_SUCCESS for _, record in batch), bool, size)
+
+        # 周一 0 点为 0 的周内小时(1970-01-01 为周四)
+        local_hours = (ts + utc_offset) // 3600
+        how = (((local_hours // 24 + 3) % 7) * 24 + local_hours % 24).astype(np.intp)
+
+        unlock = np.isin(op, UNLOCK_OPERATION_TYPES) & ok
+        user_unlock = unlock & (user >= 0)
+
+        # 先基于批次前的统计评分，再更新统计
+        gaps, valid_gaps = self._user_gaps(user, ts, user_unlock)
+        scores = np.vstack((
+            self._score_hour(lock, user, how, unlock, user_unlock),
+            self._score_interval(user, gaps, valid_gaps),
+            self._score_mechanical_key(lock, op),
+            self._score_alarm_burst(lock, ts, op),
+        ))
+
+        self._update(lock, user, ts, op, how, unlock, user_unlock, gaps, valid_gaps)
+
+        score = scores.max(axis=0)
+        reason = scores.argmax(axis=0)
+        flagged = np.flatnonzero((score >= ANOMALY_THRESHOLD) & (ts >= now - ANOMALY_MAX_AGE))
+
+        anomalies = []
+        for index in flagged:
+            wifi_sn, record = batch[index]
+            anomalies.append({
+                "wifi_sn": wifi_sn,
+                "user": record.user,
+                "timestamp": record.timestamp,
+                "operation_type": record.operation_type,
+                "operation_type_text": record.type_text,
+                "score": round(float(score[index]), 2),
+                "reason": REASONS[reason[index]],
+            })
+        return anomalies
+
+    def _ensure_capacity(self) -> None:
+        """按已登记的门锁与用户数扩展统计数组(至少一行，便于无效索引安全取值)"""
+        locks = max(len(self._locks), 1)
+        self._lock_hist = _grow(self._lock_hist, locks)
+        self._lock_key_count = _grow(self._lock_key_count, locks)
+        self._lock_alarms = _grow(self._lock_alarms, locks)
+
+        users = max(len(self._users), 1)
+        self._user_hist = _grow(self._user_hist, users)
+        self._user_last = _grow(self._user_last, users)
+        self._user_gap_n = _grow(self._user_gap_n, users)
+        self._user_gap_mean = _grow(self._user_gap_mean, users)
+        self._user_gap_m2 = _grow(self._user_gap_m2, users)
+
+    def _score_hour(
+        self,
+        lock: np.ndarray,
+        user: np.ndarray,
+        how: np.ndarray,
+        unlock: np.ndarray,
+        user_unlock: np.ndarray,
+    ) -> np.ndarray:
+        """开锁时段的意外程度：有用户时按用户直方图，否则按门锁直方图"""
+        hist = np.where(
+            user_unlock[:, None],
+            self._user_hist[np.maximum(user, 0)],
+            self._lock_hist[lock],
+        )
+        counts = hist[np.arange(len(how)), how]
+        totals = hist.sum(axis=1)
+
+        # 相对均匀分布的意外程度，常见时段为0
+        alpha = ANOMALY_SMOOTHING
+        probability = (counts + alpha) / (totals + HOURS_PER_WEEK * alpha) * HOURS_PER_WEEK
+        score = np.maximum(-np.log(probability), 0)
+        return np.where(unlock & (totals >= ANOMALY_MIN_HISTORY), score, 0)
+
+    def _user_gaps(self, user: np.ndarray, ts: np.ndarray, mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """返回每个用户开锁事件距上一次开锁的对数间隔及其有效标记"""
+        size = len(ts)
+        gaps = np.zeros(size)
+        valid = np.zeros(size, bool)
+        index = np.flatnonzero(mask)
+        if not len(index):
+            return gaps, valid
+
+        # 按用户、时间排序后取前一条；每个用户的第一条取批次前的最后开锁时间
+        order = index[np.lexsort((ts[index], user[index]))]
+        previous = np.empty(len(order))
+        previous[1:] = ts[order[:-1]]
+        first = np.ones(len(order), bool)
+        first[1:] = user[order[1:]] != user[order[:-1]]
+        previous[first] = self._user_last[user[order[first]]]
+
+        gaps[order] = np.log1p(np.maximum(ts[order] - previous, 0))
+        valid[order] = previous > 0
+        return gaps, valid
+
+    def _score_interval(self, user: np.ndarray, gaps: np.ndarray, valid: np.ndarray) -> np.ndarray:
+        """开锁间隔的意外程度：对数间隔相对用户历史的 z 分数"""
+        safe_user = np.maximum(user, 0)
+        n = self._user_gap_n[safe_user]
+        variance = self._user_gap_m2[safe_user] / np.maximum(n, 1)
+        z = (gaps - self._user_gap_mean[safe_user]) / np.sqrt(np.maximum(variance, MIN_GAP_VARIANCE))
+        return np.where(valid & (n >= ANOMALY_MIN_HISTORY), 0.5 * z * z, 0)
+
+    def _score_mechanical_key(self, lock: np.ndarray, op: np.ndarray) -> np.ndarray:
+        """机械钥匙开锁的意外程度：按该门锁历史上使用机械钥匙的比例"""
+        totals = self._lock_hist[lock].sum(axis=1)
+        probability = (self._lock_key_count[lock] + 0.5) / (totals + 1)
+        score = -np.log(probability)
+        return np.where((op == MECHANICAL_KEY_TYPE) & (totals >= ANOMALY_MIN_HISTORY), score, 0)
+
+    def _score_alarm_burst(self, lock: np.ndarray, ts: np.ndarray, op: np.ndarray) -> np.ndarray:
+        """报警突发：窗口内同一门锁的报警次数达到 ALARM_BURST_COUNT 时达到阈值"""
+        score = np.zeros(len(ts))
+        alarm = np.flatnonzero(np.isin(op, ALARM_BURST_TYPES))
+        if not len(alarm):
+            return score
+
+        # 以 (门锁, 时间) 组合键排序，区间计数即为窗口内的报警次数
+        span = ts.max() + ALARM_BURST_WINDOW + 1
+        alarm_locks = np.unique(lock[alarm])
+        history = self._lock_alarms[alarm_locks]
+        history_keys = (alarm_locks[:, None] * span + history)[history > 0]
+        keys = np.sort(np.concatenate((history_keys, lock[alarm] * span + ts[alarm])))
+        current = lock[alarm] * span + ts[alarm]
+        counts = (
+            np.searchsorted(keys, current, side="right")
+            - np.searchsorted(keys, current - ALARM_BURST_WINDOW, side="right")
+        )
+        score[alarm] = ANOMALY_THRESHOLD * counts / ALARM_BURST_COUNT
+        return score
+
+    def _update(
+        self,
+        lock: np.ndarray,
+        user: np.ndarray,
+        ts: np.ndarray,
+        op: np.ndarray,
+        how: np.ndarray,
+        unlock: np.ndarray,
+        user_unlock: np.ndarray,
+        gaps: np.ndarray,
+        valid: np.ndarray,
+    ) -> None:
+        """用本批记录更新统计"""
+        np.add.at(self._lock_hist, (lock[unlock], how[unlock]), 1)
+        np.add.at(self._user_hist, (user[user_unlock], how[user_unlock]), 1)
+        np.add.at(self._lock_key_count, lock[op == MECHANICAL_KEY_TYPE], 1)
+
+        # 按用户合并本批间隔的均值与平方差和(Chan 并行算法)
+        users = self._user_gap_n.shape[0]
+        batch_n = np.bincount(user[valid], minlength=users).astype(float)
+        batch_sum = np.bincount(user[valid], gaps[valid], minlength=users)
+        batch_sq = np.bincount(user[valid], gaps[valid] ** 2, minlength=users)
+        changed = batch_n > 0
+        if changed.any():
+            n_a = self._user_gap_n[changed]
+            n_b = batch_n[changed]
+            mean_b = batch_sum[changed] / n_b
+            m2_b = batch_sq[changed] - n_b * mean_b ** 2
+            delta = mean_b - self._user_gap_mean[changed]
+            total = n_a + n_b
+            self._user_gap_mean[changed] += delta * n_b / total
+            self._user_gap_m2[changed] += m2_b + delta ** 2 * n_a * n_b / total
+            self._user_gap_n[changed] = total
+
+        np.maximum.at(self._user_last, user[user_unlock], ts[user_unlock])
+
+        # 每把门锁只保留最近 ALARM_BURST_COUNT 次报警时间
+        alarm = np.isin(op, ALARM_BURST_TYPES)
+        for index in np.unique(lock[alarm]):
+            recent = np.concatenate((self._lock_alarms[index], ts[alarm & (lock == index)]))
+            self._lock_alarms[index] = np.sort(recent)[-ALARM_BURST_COUNT:]
@@ -1,17 +1,22 @@
 """凯迪仕门锁二进制传感器平台"""
 
 import logging
+from datetime import datetime
+from typing import Optional
 from homeassistant.components.binary_sensor import (
     BinarySensorEntity,
     BinarySensorDeviceClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
-from .const import DOMAIN, DATA_KEY_STATUS, CONF_USER_MAPPING
+from .const import DOMAIN, DATA_KEY_STATUS, CONF_USER_MAPPING, SIGNAL_ANOMALY, ANOMALY_HOLD
+from .entity import KaadasCoordinatorEntity
 from . import KaadasDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -22,8 +27,11 @@ async def async_setup_entry(
     """设置二进制传感器实体"""
     coordinator = hass.data[DOMAIN][entry.entry_id]
     
-    # 创建门锁状态传感器
-    entities = [KaadasLockBinarySensor(coordinator, entry)]
+    # 创建门锁状态传感器与异常传感器
+    entities = [
+        KaadasLockBinarySensor(coordinator, entry),
+        KaadasAnomalyBinarySensor(coordinator, entry),
+    ]
     
     # 获取用户映射
     user_mapping = entry.data.get(CONF_USER_MAPPING, {})
@@ -38,7 +46,11 @@ async def async_setup_entry(
     # 存储实体列表到协调器
     coordinator.entities = entities
 
-class KaadasLockBinarySensor(CoordinatorEntity, BinarySensorEntity):
+def _isoformat(timestamp: int) -> Optional[str]:
+    """将状态进入时间转换为 ISO 格式，未知时返回 None"""
+    return dt_util.utc_from_timestamp(timestamp).isoformat() if timestamp else None
+
+class KaadasLockBinarySensor(KaadasCoordinatorEntity, BinarySensorEntity):
     """门锁状态二进制传感器"""
     
     _attr_has_entity_name = True
@@ -63,27 +75,35 @@ class KaadasLockBinarySensor(CoordinatorEntity, BinarySensorEntity):
         return self.coordinator.last_update_success
         
     @property
-    def is_on(self) -> bool:
-        """返回传感器状态"""
-        last_text = self.coordinator.data.get(DATA_KEY_STATUS, {}).get("last_text", "")
-        return "已开锁" in last_text or "开锁" in last_text
+    def is_on(self) -> Optional[bool]:
+        """返回传感器状态(开启表示未上锁)"""
+        is_locked = self.coordinator.lock_state.is_locked
+        return None if is_locked is None else not is_locked
         
     @property
     def extra_state_attributes(self) -> dict:
         """返回额外的状态属性"""
         status = self.coordinator.data.get(DATA_KEY_STATUS, {})
+        lock_state = self.coordinator.lock_state
         return {
             "最后操作时间": status.get("last_time"),
             "最后操作": status.get("last_text"),
-            "操作用户": status.get("last_user")
+            "操作用户": status.get("last_user"),
+            "锁舌状态": lock_state.bolt,
+            "锁舌状态开始时间": _isoformat(lock_state.bolt_since),
+            "童锁": lock_state.child_lock,
+            "童锁状态开始时间": _isoformat(lock_state.child_lock_since),
+            "报警": lock_state.alarm,
+            "报警开始时间": _isoformat(lock_state.alarm_since),
         }
 
-class KaadasUserBinarySensor(CoordinatorEntity, BinarySensorEntity):
+class KaadasUserBinarySensor(KaadasCoordinatorEntity, BinarySensorEntity):
     """用户开锁状态二进制传感器"""
     
     _attr_has_entity_name = True
     _attr_device_class = BinarySensorDeviceClass.OCCUPANCY
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
     
     def __init__(
         self, 
@@ -127,4 +147,72 @@ class KaadasUserBinarySensor(CoordinatorEntity, BinarySensorEntity):
             "最后操作时间": status.get("last_time"),
             "最后操作": status.get("last_text"),
             "凯迪仕用户名": self.kaadas_username
-        }    
\ No newline at end of file
+        }
+
+class KaadasAnomalyBinarySensor(BinarySensorEntity):
+    """门锁异常访问二进制传感器"""
+    
+    _attr_has_entity_name = True
+    _attr_name = "异常访问"
+    _attr_device_class = BinarySensorDeviceClass.SAFETY
+    _attr_should_poll = False
+    
+    def __init__(self, coordinator: KaadasDataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """初始化传感器"""
+        self.coordinator = coordinator
+        self.entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_anomaly"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.unique_id)},
+            "name": f"凯迪仕门锁 {entry.data.get('wifi_sn')}",
+            "manufacturer": "凯迪仕",
+            "model": "智能门锁",
+        }
+        self._attr_is_on = False
+        self._anomaly: dict = {}
+        self._unsub_clear = None
+        
+    async def async_added_to_hass(self) -> None:
+        """订阅本门锁的异常信号"""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_ANOMALY.format(self.coordinator.api.wifi_sn),
+                self._async_handle_anomaly,
+            )
+        )
+        self.async_on_remove(self._async_cancel_clear)
+        
+    @callback
+    def _async_handle_anomaly(self, anomaly: dict) -> None:
+        """收到异常后开启，并在保持时长后自动关闭"""
+        self._anomaly = anomaly
+        self._attr_is_on = True
+        self._async_cancel_clear()
+        self._unsub_clear = async_call_later(self.hass, ANOMALY_HOLD, self._async_clear)
+        self.async_write_ha_state()
+        
+    @callback
+    def _async_clear(self, _now: Optional[datetime] = None) -> None:
+        """保持时长结束，关闭传感器"""
+        self._unsub_clear = None
+        self._attr_is_on = False
+        self.async_write_ha_state()
+        
+    @callback
+    def _async_cancel_clear(self) -> None:
+        """取消待执行的自动关闭"""
+        if self._unsub_clear is not None:
+            self._unsub_clear()
+            self._unsub_clear = None
+        
+    @property
+    def extra_state_attributes(self) -> dict:
+        """返回最近一次异常的详情"""
+        return {
+            "异常原因": self._anomaly.get("reason"),
+            "异常分数": self._anomaly.get("score"),
+            "操作用户": self._anomaly.get("user"),
+            "操作类型": self._anomaly.get("operation_type_text"),
+            "操作时间": self._anomaly.get("timestamp"),
+        }
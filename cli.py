@@ -0,0 +1,254 @@
+"""凯迪仕门锁独立轮询命令行工具
+
+无需运行 Home Assistant，轮询门锁清单中的所有门锁，并将新增记录以 NDJSON 格式输出。
+
+用法:
+    python cli.py locks.json --checkpoint state.json --output events.ndjson
+
+门锁清单为 JSON 数组，每项包含 token、wifi_sn、uid 字段。
+
+输出到文件时，检查点同时记录输出文件的写入位置；重启时先读取该位置之后已写入的事件并计入去重，
+因此在写入输出与保存检查点之间崩溃也不会重复输出。输出到标准输出时无法回读，投递语义为至少一次。
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+import types
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+if not __package__:
+    # 作为脚本运行时，不经过集成的 __init__ (依赖 Home Assistant) 直接加载 API 客户端
+    _package = types.ModuleType("kaadas_lock")
+    _package.__path__ = [os.path.dirname(os.path.abspath(__file__))]
+    sys.modules["kaadas_lock"] = _package
+    __package__ = "kaadas_lock"
+
+import aiohttp
+
+from .const import CONF_TOKEN, CONF_WIFI_SN, CONF_UID, DEFAULT_SCAN_INTERVAL
+from .kaadas_api import KaadasAPI
+from .records import KaadasRecord, KaadasRecordBuffer
+
+_LOGGER = logging.getLogger(__name__)
+
+class RateLimiter:
+    """所有门锁共享的请求速率限制"""
+
+    def __init__(self, rate: float) -> None:
+        """初始化速率限制，rate 为每秒请求数"""
+        self._interval = 1 / rate if rate > 0 else 0
+        self._lock = asyncio.Lock()
+        self._next = 0.0
+
+    async def __aenter__(self) -> None:
+        """等待下一个请求时隙"""
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self._interval
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """请求结束"""
+
+class EventWriter:
+    """NDJSON 输出，写入标准输出或按大小轮转的文件"""
+
+    def __init__(self, path: Optional[str], max_bytes: int, backup_count: int) -> None:
+        """初始化输出"""
+        self._handler = None
+        if path:
+            self._handler = RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+
+    def write(self, events: List[Dict[str, Any]]) -> None:
+        """写入一批事件并刷新"""
+        for event in events:
+            line = json.dumps(event, ensure_ascii=False)
+            if self._handler is None:
+                sys.stdout.write(line + "\n")
+            else:
+                self._handler.emit(logging.makeLogRecord({"msg": line}))
+        if self._handler is None:
+            sys.stdout.flush()
+
+    @property
+    def position(self) -> Optional[Dict[str, int]]:
+        """返回当前输出文件的 inode 与已写入字节数，输出到标准输出时返回 None"""
+        if self._handler is None or self._handler.stream is None:
+            return None
+        stream = self._handler.stream
+        return {"inode": os.fstat(stream.fileno()).st_ino, "offset": stream.tell()}
+
+    def close(self) -> None:
+        """关闭输出"""
+        if self._handler is not None:
+            self._handler.close()
+
+class Checkpoint:
+    """每把门锁的高水位记录及输出文件的写入位置，重启后据此续传且不重复输出"""
+
+    def __init__(self, path: Optional[str]) -> None:
+        """初始化并加载已有的检查点"""
+        self.path = path
+        self.locks: Dict[str, Dict[str, Any]] = {}
+        self.output: Optional[Dict[str, int]] = None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                state = json.load(file)
+            self.locks = state["locks"]
+            self.output = state.get("output")
+
+    def save(self, buffers: Dict[str, KaadasRecordBuffer], output: Optional[Dict[str, int]]) -> None:
+        """原子写入检查点"""
+        if not self.path:
+            return
+        self.locks = {wifi_sn: buffer.checkpoint() for wifi_sn, buffer in buffers.items()}
+        self.output = output
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump({"locks": self.locks, "output": output}, file)
+        os.replace(tmp_path, self.path)
+
+def recover_output(path: Optional[str], output: Optional[Dict[str, int]], buffers: Dict[str, KaadasRecordBuffer]) -> int:
+    """将检查点之后已写入输出文件的事件计入去重位置，返回恢复的事件数
+
+    输出文件在此期间发生轮转时，先读取轮转出的 .1 文件的剩余部分，再读取新文件。
+    """
+    if not path or output is None:
+        return 0
+
+    sources = []
+    if os.path.exists(path) and os.stat(path).st_ino == output["inode"]:
+        sources.append((path, output["offset"]))
+    else:
+        rotated = f"{path}.1"
+        if os.path.exists(rotated) and os.stat(rotated).st_ino == output["inode"]:
+            sources.append((rotated, output["offset"]))
+        sources.append((path, 0))
+
+    recovered: Dict[str, List[KaadasRecord]] = {}
+    for source, offset in sources:
+        if not os.path.exists(source):
+            continue
+        with open(source, "rb") as file:
+            file.seek(offset)
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # 崩溃时写了一半的行
+                    continue
+                if event.get("wifi_sn") in buffers:
+                    recovered.setdefault(event["wifi_sn"], []).append(
+                        KaadasRecord(event["timestamp"], event["operation_type"], event["operation_result"], event["user"])
+                    )
+
+    for wifi_sn, records in recovered.items():
+        buffers[wifi_sn].ingest(records)
+    return sum(len(records) for records in recovered.values())
+
+def load_inventory(path: str) -> List[Dict[str, str]]:
+    """读取门锁清单"""
+    with open(path, encoding="utf-8") as file:
+        inventory = json.load(file)
+
+    for lock in inventory:
+        missing = [key for key in (CONF_TOKEN, CONF_WIFI_SN, CONF_UID) if not lock.get(key)]
+        if missing:
+            raise ValueError(f"门锁清单项缺少字段: {', '.join(missing)}")
+    return inventory
+
+async def async_poll_lock(
+    api: KaadasAPI,
+    buffer: KaadasRecordBuffer,
+    semaphore: asyncio.Semaphore,
+    limiter: RateLimiter,
+) -> List[Dict[str, Any]]:
+    """轮询单把门锁，返回新增记录对应的事件"""
+    async with semaphore, limiter:
+        status = await api.async_get_lock_status()
+
+    return [
+        {"wifi_sn": api.wifi_sn, "battery": status.get("battery"), **record.as_dict()}
+        for record in buffer.ingest(status.get("records", ()))
+    ]
+
+async def async_run(args: argparse.Namespace) -> None:
+    """按间隔轮询所有门锁"""
+    inventory = load_inventory(args.inventory)
+    checkpoint = Checkpoint(args.checkpoint)
+    writer = EventWriter(args.output, args.max_bytes, args.backup_count)
+    time_zone = ZoneInfo(args.timezone) if args.timezone else None
+    semaphore = asyncio.Semaphore(args.concurrency)
+    limiter = RateLimiter(args.rate)
+
+    async with aiohttp.ClientSession() as session:
+        apis = [
+            KaadasAPI(
+                lock[CONF_TOKEN], lock[CONF_WIFI_SN], lock[CONF_UID], session=session, time_zone=time_zone
+            )
+            for lock in inventory
+        ]
+        buffers: Dict[str, KaadasRecordBuffer] = {}
+        for api in apis:
+            buffer = buffers[api.wifi_sn] = KaadasRecordBuffer()
+            buffer.restore(checkpoint.locks.get(api.wifi_sn, {}))
+
+        recovered = recover_output(args.output, checkpoint.output, buffers)
+        if recovered:
+            _LOGGER.info("检查点之后已输出 %s 条事件，续传时跳过", recovered)
+
+        try:
+            while True:
+                started = time.monotonic()
+                results = await asyncio.gather(
+                    *(async_poll_lock(api, buffers[api.wifi_sn], semaphore, limiter) for api in apis)
+                )
+                events = [event for lock_events in results for event in lock_events]
+
+                # 先输出记录再保存检查点，保证重启后不会漏记
+                if events:
+                    writer.write(events)
+                    checkpoint.save(buffers, writer.position)
+
+                if args.once:
+                    break
+                await asyncio.sleep(max(0, args.interval - (time.monotonic() - started)))
+        finally:
+            writer.close()
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="轮询凯迪仕门锁并以 NDJSON 输出新增记录")
+    parser.add_argument("inventory", help="门锁清单 JSON 文件")
+    parser.add_argument("--checkpoint", help="检查点文件，用于重启后续传")
+    parser.add_argument("--output", help="输出文件，默认输出到标准输出")
+    parser.add_argument("--max-bytes", type=int, default=100 * 1024 * 1024, help="输出文件轮转大小(字节)")
+    parser.add_argument("--backup-count", type=int, default=10, help="保留的轮转文件数")
+    parser.add_argument("--interval", type=float, default=DEFAULT_SCAN_INTERVAL, help="轮询间隔(秒)")
+    parser.add_argument("--concurrency", type=int, default=10, help="最大并发请求数")
+    parser.add_argument("--rate", type=float, default=5, help="所有门锁共享的每秒请求数上限")
+    parser.add_argument("--timezone", help="门锁所在时区(如 Asia/Shanghai)，默认使用本机时区")
+    parser.add_argument("--once", action="store_true", help="只轮询一轮后退出")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+
+    try:
+        asyncio.run(async_run(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""凯迪仕门锁命令队列"""
+
+import asyncio
+import logging
+import time
+from typing import TYPE_CHECKING, Optional, Tuple
+
+from .const import (
+    COMMAND_LOCK,
+    COMMAND_UNLOCK,
+    CONFIRM_POLL_INTERVAL,
+    CONFIRM_POLL_ATTEMPTS,
+    RESULT_SUCCESS,
+    METRIC_COMMANDS,
+    METRIC_COMMANDS_COALESCED,
+    METRIC_COMMANDS_UNCONFIRMED,
+    METRIC_COMMAND_LATENCY,
+)
+from .state_machine import BOLT_DEADBOLTED, BOLT_LOCKED, BOLT_UNLOCKED, bolt_operation_types
+
+if TYPE_CHECKING:
+    from . import KaadasDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+# 各命令对应的确认记录类型，取自状态机中使锁舌进入目标状态的操作
+COMMAND_CONFIRM_TYPES = {
+    COMMAND_UNLOCK: bolt_operation_types(BOLT_UNLOCKED),
+    COMMAND_LOCK: bolt_operation_types(BOLT_LOCKED, BOLT_DEADBOLTED),
+}
+
+class KaadasCommandQueue:
+    """单把门锁的命令队列
+    
+    命令按提交顺序串行执行；新命令与队尾尚未开始执行的命令相同时合并为一次下发，
+    中间夹有相反命令时不合并，以免改变执行顺序。
+    命令成功后连续轮询，直到出现对应的门锁记录。
+    """
+    
+    def __init__(self, coordinator: "KaadasDataUpdateCoordinator") -> None:
+        """初始化命令队列"""
+        self.coordinator = coordinator
+        self._lock = asyncio.Lock()
+        # 队尾尚未开始执行的命令及其任务
+        self._tail: Optional[Tuple[str, asyncio.Task]] = None
+        self.metrics = {
+            METRIC_COMMANDS: 0,
+            METRIC_COMMANDS_COALESCED: 0,
+            METRIC_COMMANDS_UNCONFIRMED: 0,
+            METRIC_COMMAND_LATENCY: None,
+        }
+    
+    async def async_submit(self, command: str) -> Optional[float]:
+        """提交命令并等待执行完成，返回命令到状态确认的耗时(秒)"""
+        if self._tail is not None and self._tail[0] == command:
+            task = self._tail[1]
+            self.metrics[METRIC_COMMANDS_COALESCED] += 1
+        else:
+            task = self.coordinator.hass.async_create_task(self._async_run(command))
+            self._tail = (command, task)
+        
+        # 调用方取消等待时不影响已排队的命令
+        return await asyncio.shield(task)
+    
+    async def _async_run(self, command: str) -> Optional[float]:
+        """执行命令并轮询确认"""
+        started = time.monotonic()
+        
+        try:
+            async with self._lock:
+                # 开始执行后，新的相同命令不再合并到本次
+                self._clear_tail()
+                high_water_mark = self.coordinator.records.high_water_mark
+                
+                await getattr(self.coordinator.api, f"async_{command}")()
+                self.metrics[METRIC_COMMANDS] += 1
+                
+                if await self._async_confirm(command, high_water_mark):
+                    latency = time.monotonic() - started
+                    self.metrics[METRIC_COMMAND_LATENCY] = round(latency, 3)
+                    _LOGGER.debug("门锁命令 %s 已确认，耗时 %.2f 秒", command, latency)
+                    return latency
+                
+                self.metrics[METRIC_COMMANDS_UNCONFIRMED] += 1
+                _LOGGER.warning("门锁命令 %s 已下发，但未在确认轮询内见到对应记录", command)
+                return None
+        finally:
+            self._clear_tail()
+    
+    def _clear_tail(self) -> None:
+        """当前任务仍位于队尾时将其移出"""
+        if self._tail is not None and self._tail[1] is asyncio.current_task():
+            self._tail = None
+    
+    async def _async_confirm(self, command: str, high_water_mark: int) -> bool:
+        """连续刷新，直到出现高水位之后的对应记录"""
+        confirm_types = COMMAND_CONFIRM_TYPES[command]
+        
+        for _ in range(CONFIRM_POLL_ATTEMPTS):
+            await asyncio.sleep(CONFIRM_POLL_INTERVAL)
+            await self.coordinator.async_refresh()
+            
+            # 从最新记录向前查找，期间的定时刷新新增的记录也会被检查到
+            for record in reversed(self.coordinator.records):
+                if record.timestamp <= high_water_mark:
+                    break
+                if record.operation_type in confirm_types and record.operation_result == RESULT_SUCCESS:
+                    return True
+        
+        return False
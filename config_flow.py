@@ -12,6 +12,10 @@ from .const import (
     CONF_WIFI_SN,
     CONF_UID,
     CONF_USER_MAPPING,
+    CONF_ENABLE_METRICS,
+    CONF_PRESENCE_TIMEOUT,
+    DEFAULT_PRESENCE_TIMEOUT,
+    METRICS_URL,
 )
 
 _LOGGER = logging.getLogger(__name__)
@@ -173,9 +177,13 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
                 return await self.async_step_select_delete_user()
             elif action == "edit_base":
                 return await self.async_step_edit_base_config()
+            elif action == "metrics":
+                return await self.async_step_metrics()
+            elif action == "presence":
+                return await self.async_step_presence()
             elif action == "refresh":
                 await self._async_trigger_refresh()
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data=dict(self._config_entry.options))
         
         return self.async_show_form(
             step_id="init",
@@ -185,6 +193,8 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
                     "add": "添加用户",
                     "edit": "修改用户",
                     "delete": "删除用户",
+                    "metrics": "Prometheus 指标",
+                    "presence": "在家状态",
                     "refresh": "刷新门锁数据"
                 })
             }),
@@ -219,7 +229,7 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
                 # 触发数据刷新
                 await self._async_trigger_refresh()
                 
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data=dict(self._config_entry.options))
                 
             except Exception as e:
                 errors["base"] = "更新配置失败，请重试"
@@ -239,6 +249,51 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
             }
         )
         
+    async def async_step_metrics(self, user_input=None) -> FlowResult:
+        """设置是否导出 Prometheus 指标"""
+        if user_input is not None:
+            return self.async_create_entry(
+                title="",
+                data={
+                    **self._config_entry.options,
+                    CONF_ENABLE_METRICS: user_input[CONF_ENABLE_METRICS],
+                }
+            )
+        
+        return self.async_show_form(
+            step_id="metrics",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_ENABLE_METRICS,
+                    default=self._config_entry.options.get(CONF_ENABLE_METRICS, False)
+                ): bool
+            }),
+            description_placeholders={
+                "url": METRICS_URL
+            }
+        )
+        
+    async def async_step_presence(self, user_input=None) -> FlowResult:
+        """设置开锁后视为在家的时长"""
+        if user_input is not None:
+            return self.async_create_entry(
+                title="",
+                data={
+                    **self._config_entry.options,
+                    CONF_PRESENCE_TIMEOUT: user_input[CONF_PRESENCE_TIMEOUT],
+                }
+            )
+        
+        return self.async_show_form(
+            step_id="presence",
+            data_schema=vol.Schema({
+                vol.Required(
+                    CONF_PRESENCE_TIMEOUT,
+                    default=self._config_entry.options.get(CONF_PRESENCE_TIMEOUT, DEFAULT_PRESENCE_TIMEOUT)
+                ): vol.All(vol.Coerce(int), vol.Range(min=1))
+            })
+        )
+        
     async def async_step_add_user(self, user_input=None) -> FlowResult:
         """添加新用户映射"""
         errors = {}
@@ -268,7 +323,7 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
                 # 触发数据刷新
                 await self._async_trigger_refresh()
                 
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data=dict(self._config_entry.options))
             except ValueError as ve:
                 errors["base"] = str(ve)
             except Exception as e:
@@ -349,7 +404,7 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
                 # 触发数据刷新
                 await self._async_trigger_refresh()
                 
-                return self.async_create_entry(title="", data={})
+                return self.async_create_entry(title="", data=dict(self._config_entry.options))
             except ValueError as ve:
                 errors["base"] = str(ve)
             except Exception as e:
@@ -420,7 +475,7 @@ class KaadasLockOptionsFlowHandler(config_entries.OptionsFlow):
                     # 触发数据刷新
                     await self._async_trigger_refresh()
                     
-                    return self.async_create_entry(title="", data={})
+                    return self.async_create_entry(title="", data=dict(self._config_entry.options))
                 except Exception as e:
                     errors = {"base": "删除用户失败，请重试"}
                     _LOGGER.error("删除用户失败: %s", str(e))
@@ -2,6 +2,9 @@
 
 DOMAIN = "kaadas_lock"
 
+# 协调器数据键
+DATA_KEY_STATUS = "status"
+
 # 配置项
 CONF_TOKEN = "token"
 CONF_WIFI_SN = "wifi_sn"
@@ -9,4 +12,131 @@ CONF_UID = "uid"
 CONF_USER_MAPPING = "user_mapping"
 
 # 默认值
-DEFAULT_SCAN_INTERVAL = 30  # 数据刷新间隔(秒)    
\ No newline at end of file
+DEFAULT_SCAN_INTERVAL = 30  # 数据刷新间隔(秒)
+LOW_BATTERY_THRESHOLD = 20  # 低电量阈值(%)
+
+# API
+API_BASE_URL = "https://api.kaadas.com.cn/kaadas-app"
+REQUEST_TIMEOUT = 15  # 单次请求超时(秒)
+
+# 共享数据键(hass.data[DOMAIN] 中除配置项外的数据)
+DATA_ANOMALY = "anomaly"
+DATA_FLEET = "fleet"
+DATA_PRESENCE = "presence"
+
+# 汇总统计
+SIGNAL_FLEET_UPDATED = f"{DOMAIN}_fleet_updated"
+FLEET_ALARM_WINDOW = 3600  # 统计报警次数的时间窗口(秒)
+
+# 在家状态推断
+CONF_PRESENCE_TIMEOUT = "presence_timeout"
+DEFAULT_PRESENCE_TIMEOUT = 360  # 开锁后视为在家的时长(分钟)
+SIGNAL_PRESENCE_UPDATED = f"{DOMAIN}_presence_{{}}"  # 按本地用户名区分的调度信号
+
+# 记录推送
+SIGNAL_NEW_RECORDS = f"{DOMAIN}_new_records"  # 参数: wifi_sn, 新增记录列表
+WS_BACKLOG_PAGE_SIZE = 100  # 每条推送最多包含的事件数
+WS_MAX_PENDING = 500  # 等待客户端确认期间每个订阅最多缓存的实时事件数，超出时丢弃最旧的事件
+
+# 异常检测
+EVENT_ANOMALY = f"{DOMAIN}_anomaly"  # 异常事件总线事件
+SIGNAL_ANOMALY = f"{DOMAIN}_anomaly_{{}}"  # 按 wifi_sn 区分的调度信号
+ANOMALY_THRESHOLD = 3.0  # 异常分数阈值(奈特)
+ANOMALY_MIN_HISTORY = 50  # 参与评分所需的最少历史事件数
+ANOMALY_SMOOTHING = 0.01  # 直方图平滑系数
+ANOMALY_MAX_AGE = 3600  # 只对该时长(秒)内的记录告警，更早的记录仅用于学习
+ANOMALY_HOLD = 3600  # 异常传感器保持开启的时长(秒)
+ANOMALY_BATCH_DELAY = 1  # 汇总各门锁记录成批评分的等待时间(秒)
+ALARM_BURST_TYPES = (11, 12)  # 撬锁报警、试错报警
+ALARM_BURST_COUNT = 3  # 窗口内达到该次数即视为报警突发
+ALARM_BURST_WINDOW = 600  # 报警突发窗口(秒)
+MECHANICAL_KEY_TYPE = 4
+
+# 熔断
+CIRCUIT_BREAKER_THRESHOLD = 5  # 连续失败该次数后熔断
+CIRCUIT_BREAKER_INTERVAL = 300  # 熔断期间的轮询间隔(秒)
+
+# 指标
+CONF_ENABLE_METRICS = "enable_metrics"
+METRICS_URL = f"/api/{DOMAIN}/metrics"
+POLL_LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # 轮询耗时直方图上界(秒)
+
+# 记录导出
+SERVICE_EXPORT_RECORDS = "export_records"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_PARQUET = "parquet"
+EXPORT_DIR = "kaadas_lock_exports"  # 默认导出目录(相对配置目录)
+EXPORT_CHUNK_SIZE = 1000  # 每次写入的记录数
+EXPORT_PAGE_SIZE = 100  # 云端记录每页条数
+EXPORT_MAX_PAGES = 1000  # 单把门锁最多拉取的页数
+
+# 性能分析
+SERVICE_PROFILE = "profile"
+PROFILE_DEFAULT_CYCLES = 3  # 默认分析的刷新周期数
+PROFILE_MAX_CYCLES = 50
+PROFILE_TOP = 15  # 返回摘要中的函数与内存分配条数
+
+# 门锁命令
+COMMAND_LOCK = "lock"
+COMMAND_UNLOCK = "unlock"
+CONFIRM_POLL_INTERVAL = 2  # 命令后确认轮询间隔(秒)
+CONFIRM_POLL_ATTEMPTS = 10  # 命令后确认轮询次数
+
+# 指标名称
+METRIC_POLLS = "polls"  # 成功轮询次数
+METRIC_UNCHANGED = "unchanged"  # 响应未变化而跳过解析的次数
+METRIC_NOT_MODIFIED = "not_modified"  # 服务端返回304的次数
+METRIC_ERRORS = "errors"  # 状态请求失败次数
+METRIC_FANOUT_SKIPPED = "fanout_skipped"  # 跳过监听器通知的次数
+METRIC_COMMANDS = "commands"  # 实际下发的命令数
+METRIC_COMMANDS_COALESCED = "commands_coalesced"  # 被合并的重复命令数
+METRIC_COMMANDS_UNCONFIRMED = "commands_unconfirmed"  # 确认轮询未见到结果的命令数
+METRIC_COMMAND_LATENCY = "command_latency"  # 最近一次命令到状态确认的耗时(秒)
+
+# 记录保留
+RECORD_BUDGET_BYTES = 16 * 1024  # 每把门锁保留记录的内存上限(字节)
+
+# 操作类型
+OPERATION_TYPES = {
+    1: "指纹",
+    2: "密码",
+    3: "NFC",
+    4: "机械钥匙",
+    5: "APP",
+    6: "自动",
+    7: "胁迫指纹",
+    8: "童锁",
+    9: "上提反锁",
+    10: "门未关报警",
+    11: "撬锁报警",
+    12: "试错报警",
+    13: "低电量报警",
+    14: "电池耗尽",
+    15: "恢复出厂设置",
+    16: "用户添加",
+    17: "用户删除",
+    18: "用户修改",
+    19: "管理员添加",
+    20: "管理员删除",
+    21: "管理员修改",
+    22: "密码重置",
+    23: "指纹重置",
+    24: "NFC重置",
+    25: "报警解除",
+    26: "防猫眼锁定",
+    27: "防猫眼解锁",
+    28: "童锁锁定",
+    29: "童锁解锁",
+}
+UNLOCK_OPERATION_TYPES = (1, 2, 3, 4, 5)
+LOCK_OPERATION_TYPES = (9, 26, 28)
+RELEASE_OPERATION_TYPES = (27, 29)
+ALARM_OPERATION_TYPES = (10, 11, 12, 13, 14)
+
+# 操作结果
+RESULT_SUCCESS = 1
+RESULT_FAILURE = 2
+OPERATION_RESULTS = {
+    RESULT_SUCCESS: "成功",
+    RESULT_FAILURE: "失败",
+}
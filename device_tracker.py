@@ -0,0 +1,86 @@
+"""凯迪仕门锁在家状态追踪平台"""
+
+import logging
+from homeassistant.components.device_tracker import ScannerEntity, SourceType
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, SIGNAL_PRESENCE_UPDATED
+from .presence import KaadasPresence, KaadasPresenceModel, async_get_presence
+
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """设置在家状态追踪实体"""
+    presence = async_get_presence(hass)
+
+    # 同一本地用户可能映射在多把门锁上，由模型指定一个配置项创建实体，
+    # 该配置项卸载或映射变化后由模型通过其他已登记的配置项重新创建
+    presence.async_register_platform(
+        entry.entry_id, async_add_entities, lambda person: KaadasPresenceTracker(presence, person)
+    )
+
+class KaadasPresenceTracker(ScannerEntity):
+    """本地用户在家状态，由全部门锁的开锁记录推断"""
+
+    _attr_should_poll = False
+    _attr_icon = "mdi:home-account"
+
+    def __init__(self, presence: KaadasPresenceModel, person: KaadasPresence) -> None:
+        """初始化追踪实体"""
+        self.presence = presence
+        self.person = person
+        self._attr_name = f"{person.name} 在家"
+        self._attr_unique_id = f"{DOMAIN}_presence_{person.name}"
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        """默认启用"""
+        return True
+
+    @property
+    def source_type(self) -> SourceType:
+        """返回来源类型"""
+        return SourceType.ROUTER
+
+    @property
+    def is_connected(self) -> bool:
+        """用户是否在家"""
+        return self.person.home
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """返回额外的状态属性"""
+        person = self.person
+        return {
+            "最后开锁时间": (
+                dt_util.utc_from_timestamp(person.last_seen).isoformat() if person.last_seen else None
+            ),
+            "最后开锁门锁": person.last_wifi_sn,
+            "凯迪仕用户名": person.last_username,
+        }
+
+    async def async_added_to_hass(self) -> None:
+        """订阅该用户的在家状态变化"""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, SIGNAL_PRESENCE_UPDATED.format(self.person.name), self._async_handle_update
+            )
+        )
+
+    @callback
+    def _async_handle_update(self) -> None:
+        """在家状态变化时写入状态，用户已不再被任何门锁映射时移除实体"""
+        if self.presence.persons.get(self.person.name) is not self.person:
+            if self.registry_entry is not None:
+                er.async_get(self.hass).async_remove(self.entity_id)
+            else:
+                self.hass.async_create_task(self.async_remove(force_remove=True))
+            return
+        self.async_write_ha_state()
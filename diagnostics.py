@@ -0,0 +1,27 @@
+"""凯迪仕门锁诊断信息"""
+
+from typing import Any, Dict
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN, CONF_TOKEN, CONF_UID
+
+TO_REDACT = {CONF_TOKEN, CONF_UID}
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> Dict[str, Any]:
+    """返回配置项诊断信息"""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    
+    return {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+        "metrics": {
+            **coordinator.api.metrics,
+            **coordinator.metrics,
+            **coordinator.commands.metrics,
+            "skip_rate": round(coordinator.skip_rate, 4),
+            "breaker_open": coordinator.breaker_open,
+        },
+    }
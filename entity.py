@@ -0,0 +1,20 @@
+"""凯迪仕门锁实体基类"""
+
+from typing import Any, Optional, Tuple
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+class KaadasCoordinatorEntity(CoordinatorEntity):
+    """协调器实体，仅在可用性、状态或属性变化时写入状态"""
+    
+    _last_written: Optional[Tuple[Any, ...]] = None
+    
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """协调器更新时比较快照，未变化则跳过状态写入"""
+        snapshot = (self.available, self.state, self.extra_state_attributes)
+        if snapshot == self._last_written:
+            return
+        self._last_written = snapshot
+        self.async_write_ha_state()
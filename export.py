@@ -0,0 +1,255 @@
+"""凯迪仕门锁记录导出"""
+
+import csv
+import gzip
+import logging
+import os
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Sequence, Tuple
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SERVICE_EXPORT_RECORDS,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_PARQUET,
+    EXPORT_DIR,
+    EXPORT_CHUNK_SIZE,
+    EXPORT_PAGE_SIZE,
+    EXPORT_MAX_PAGES,
+)
+from .kaadas_api import KaadasAPIError
+from .records import KaadasRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    "wifi_sn",
+    "time",
+    "timestamp",
+    "operation_type",
+    "operation_type_text",
+    "operation_result",
+    "operation_result_text",
+    "user",
+)
+
+EXPORT_SCHEMA = vol.Schema({
+    vol.Optional("wifi_sn"): vol.All(cv.ensure_list, [cv.string]),
+    vol.Required("start"): cv.datetime,
+    vol.Required("end"): cv.datetime,
+    vol.Optional("format", default=EXPORT_FORMAT_CSV): vol.In([EXPORT_FORMAT_CSV, EXPORT_FORMAT_PARQUET]),
+    vol.Optional("path"): cv.string,
+})
+
+Chunk = List[Tuple[str, KaadasRecord]]
+
+def _row(wifi_sn: str, record: KaadasRecord) -> tuple:
+    """将记录转换为导出行"""
+    return (
+        wifi_sn,
+        datetime.fromtimestamp(record.timestamp, timezone.utc).isoformat(),
+        record.timestamp,
+        record.operation_type,
+        record.type_text,
+        record.operation_result,
+        record.result_text,
+        record.user,
+    )
+
+class CsvExportWriter:
+    """gzip 压缩的 CSV 写入器(在执行器线程中使用)"""
+
+    def __init__(self, path: str) -> None:
+        """打开文件并写入表头"""
+        self._file = gzip.open(path, "wt", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(EXPORT_COLUMNS)
+
+    def write(self, chunk: Chunk) -> None:
+        """写入一批记录"""
+        self._writer.writerows(_row(wifi_sn, record) for wifi_sn, record in chunk)
+
+    def close(self) -> None:
+        """关闭文件"""
+        self._file.close()
+
+class ParquetExportWriter:
+    """zstd 压缩的 Parquet 写入器(在执行器线程中使用)，需要安装 pyarrow"""
+
+    def __init__(self, path: str) -> None:
+        """创建 Parquet 文件"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self._pa = pa
+        self._schema = pa.schema([
+            ("wifi_sn", pa.string()),
+            ("time", pa.string()),
+            ("timestamp", pa.timestamp("s", tz="UTC")),
+            ("operation_type", pa.int16()),
+            ("operation_type_text", pa.string()),
+            ("operation_result", pa.int8()),
+            ("operation_result_text", pa.string()),
+            ("user", pa.string()),
+        ])
+        self._writer = pq.ParquetWriter(path, self._schema, compression="zstd")
+
+    def write(self, chunk: Chunk) -> None:
+        """以一个行组写入一批记录"""
+        columns = zip(*(_row(wifi_sn, record) for wifi_sn, record in chunk))
+        table = self._pa.Table.from_arrays(
+            [self._pa.array(column, type=field.type) for column, field in zip(columns, self._schema)],
+            schema=self._schema,
+        )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        """关闭文件"""
+        self._writer.close()
+
+async def _async_iter_records(
+    coordinator: DataUpdateCoordinator, start: int, end: int
+) -> AsyncIterator[KaadasRecord]:
+    """按时间从新到旧输出一把门锁在 [start, end) 内的记录
+
+    缓冲区只能保证 coverage 范围内的记录完整(轮询中断或熔断期间可能有遗漏)，
+    该范围内使用内存中保留的记录，范围之外的部分分页向云端拉取。
+    """
+    retained = coordinator.records
+    # 缓冲区没有可保证的范围时全部向云端拉取
+    covered_from, covered_to = retained.coverage or (end, end - 1)
+
+    # 先复制引用，避免遍历期间缓冲区被刷新修改
+    buffered = [
+        record
+        for record in reversed(retained)
+        if max(start, covered_from) <= record.timestamp < end and record.timestamp <= covered_to
+    ]
+    need_newer = end > covered_to + 1
+    need_older = start < covered_from
+    if not need_newer and not need_older:
+        for record in buffered:
+            yield record
+        return
+
+    buffered_sent = False
+    for page in range(1, EXPORT_MAX_PAGES + 1):
+        records = await coordinator.api.async_get_records(page, EXPORT_PAGE_SIZE)
+        for record in records:
+            if record.timestamp < covered_from and not buffered_sent:
+                for retained_record in buffered:
+                    yield retained_record
+                buffered_sent = True
+            if start <= record.timestamp < end and not covered_from <= record.timestamp <= covered_to:
+                yield record
+        if (
+            not records
+            or records[-1].timestamp < start
+            or (not need_older and records[-1].timestamp <= covered_to)
+        ):
+            break
+    else:
+        _LOGGER.warning("门锁 %s 的记录超过 %s 页，导出已截断", coordinator.api.wifi_sn, EXPORT_MAX_PAGES)
+
+    if not buffered_sent:
+        for record in buffered:
+            yield record
+
+async def _async_iter_chunks(
+    coordinators: Sequence[DataUpdateCoordinator], start: int, end: int
+) -> AsyncIterator[Chunk]:
+    """将各门锁的记录按 EXPORT_CHUNK_SIZE 分块输出"""
+    chunk: Chunk = []
+    for coordinator in coordinators:
+        async for record in _async_iter_records(coordinator, start, end):
+            chunk.append((coordinator.api.wifi_sn, record))
+            if len(chunk) >= EXPORT_CHUNK_SIZE:
+                yield chunk
+                chunk = []
+    if chunk:
+        yield chunk
+
+def _open_writer(path: str, export_format: str):
+    """创建导出目录并打开写入器"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if export_format == EXPORT_FORMAT_PARQUET:
+        return ParquetExportWriter(path)
+    return CsvExportWriter(path)
+
+def _close_writer(writer, temp_path: str, path: Optional[str]) -> None:
+    """关闭写入器；导出完成时将临时文件改名为目标文件，否则删除临时文件"""
+    try:
+        writer.close()
+    finally:
+        if path is None:
+            os.remove(temp_path)
+    if path is not None:
+        os.replace(temp_path, path)
+
+@callback
+def async_register_export_service(hass: HomeAssistant) -> None:
+    """注册记录导出服务"""
+
+    async def async_handle_export(call: ServiceCall) -> ServiceResponse:
+        """导出指定门锁、指定时间范围的记录"""
+        start = int(dt_util.as_timestamp(call.data["start"]))
+        end = int(dt_util.as_timestamp(call.data["end"]))
+        export_format = call.data["format"]
+        wifi_sns = set(call.data.get("wifi_sn", ()))
+
+        coordinators = [
+            coordinator
+            for coordinator in hass.data.get(DOMAIN, {}).values()
+            if isinstance(coordinator, DataUpdateCoordinator)
+            and (not wifi_sns or coordinator.api.wifi_sn in wifi_sns)
+        ]
+        if not coordinators:
+            raise HomeAssistantError("没有匹配的门锁")
+
+        suffix = "parquet" if export_format == EXPORT_FORMAT_PARQUET else "csv.gz"
+        start_text = dt_util.as_local(call.data["start"]).strftime("%Y%m%d")
+        end_text = dt_util.as_local(call.data["end"]).strftime("%Y%m%d")
+        path = call.data.get("path")
+        if path:
+            # 用户指定的路径须在 allowlist_external_dirs 内；检查涉及文件系统访问，在执行器中进行
+            if not await hass.async_add_executor_job(hass.config.is_allowed_path, path):
+                raise HomeAssistantError(f"不允许写入路径: {path}")
+        else:
+            path = hass.config.path(EXPORT_DIR, f"kaadas_records_{start_text}_{end_text}.{suffix}")
+
+        # 先写入临时文件，完成后再改名，失败时不留下不完整的导出文件
+        temp_path = f"{path}.part"
+        try:
+            writer = await hass.async_add_executor_job(_open_writer, temp_path, export_format)
+        except ImportError as e:
+            raise HomeAssistantError("导出 Parquet 需要安装 pyarrow") from e
+
+        count = 0
+        completed = False
+        try:
+            async for chunk in _async_iter_chunks(coordinators, start, end):
+                await hass.async_add_executor_job(writer.write, chunk)
+                count += len(chunk)
+            completed = True
+        except KaadasAPIError as e:
+            raise HomeAssistantError(f"拉取云端记录失败: {e}") from e
+        finally:
+            await hass.async_add_executor_job(_close_writer, writer, temp_path, path if completed else None)
+
+        _LOGGER.info("已导出 %s 条门锁记录到 %s", count, path)
+        return {"path": path, "records": count}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_EXPORT_RECORDS,
+        async_handle_export,
+        schema=EXPORT_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
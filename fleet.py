@@ -0,0 +1,170 @@
+"""凯迪仕门锁汇总统计"""
+
+import heapq
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_change, async_track_time_interval
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_FLEET,
+    DATA_KEY_STATUS,
+    SIGNAL_FLEET_UPDATED,
+    FLEET_ALARM_WINDOW,
+    LOW_BATTERY_THRESHOLD,
+    UNLOCK_OPERATION_TYPES,
+    ALARM_OPERATION_TYPES,
+    RESULT_SUCCESS,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+@callback
+def async_get_fleet(hass: HomeAssistant) -> "KaadasFleetStats":
+    """返回全部门锁共享的汇总统计"""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_FLEET not in domain_data:
+        domain_data[DATA_FLEET] = KaadasFleetStats(hass)
+    return domain_data[DATA_FLEET]
+
+class KaadasFleetStats:
+    """全部门锁的汇总计数
+
+    计数只在单把门锁发生变化时增量更新，读取时不遍历门锁或实体。
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """初始化汇总统计"""
+        self.hass = hass
+        self.owner_entry_id: Optional[str] = None
+        # 各配置项传感器平台的实体添加回调与汇总实体工厂，拥有者卸载时由其余配置项接管
+        self._platforms: Dict[str, Tuple[AddEntitiesCallback, Callable[[], List[Entity]]]] = {}
+        self.low_battery: Set[str] = set()
+        self.unavailable: Set[str] = set()
+        # 各门锁的报警到达顺序与发生时间不一致，用最小堆保证最旧的报警在堆顶
+        self._alarm_times: List[int] = []
+        self.unlocks_today: Counter = Counter()
+        self._today_start = self._start_of_today()
+        self._unsubs = [
+            async_track_time_interval(self.hass, self._async_expire_alarms, timedelta(minutes=1)),
+            async_track_time_change(self.hass, self._async_reset_daily, hour=0, minute=0, second=0),
+        ]
+
+    @staticmethod
+    def _start_of_today() -> int:
+        """返回本地今天零点的时间戳"""
+        return int(dt_util.start_of_local_day().timestamp())
+
+    @property
+    def alarms_last_hour(self) -> int:
+        """返回最近一小时的报警次数"""
+        return len(self._alarm_times)
+
+    @callback
+    def async_register_platform(
+        self,
+        entry_id: str,
+        async_add_entities: AddEntitiesCallback,
+        entity_factory: Callable[[], List[Entity]],
+    ) -> None:
+        """登记配置项的传感器平台，尚无配置项拥有汇总实体时由它创建"""
+        self._platforms[entry_id] = (async_add_entities, entity_factory)
+        if self.owner_entry_id is None:
+            self._async_create_entities(entry_id)
+
+    @callback
+    def async_release(self, entry_id: str) -> None:
+        """配置项卸载时注销其平台，若它拥有汇总实体则交由其余配置项重新创建"""
+        self._platforms.pop(entry_id, None)
+        if self.owner_entry_id != entry_id:
+            return
+        self.owner_entry_id = None
+        if self._platforms:
+            self._async_create_entities(next(iter(self._platforms)))
+
+    @callback
+    def _async_create_entities(self, entry_id: str) -> None:
+        """通过指定配置项的平台创建汇总实体"""
+        async_add_entities, entity_factory = self._platforms[entry_id]
+        self.owner_entry_id = entry_id
+        async_add_entities(entity_factory())
+
+    @callback
+    def async_update_lock(self, coordinator: DataUpdateCoordinator, user_mapping: Dict[str, str]) -> None:
+        """根据一把门锁本次刷新的结果更新计数"""
+        wifi_sn = coordinator.api.wifi_sn
+        changed = False
+
+        # 请求失败时返回的电量为占位值，不参与低电量统计
+        if coordinator.api.last_request_ok:
+            battery = (coordinator.data or {}).get(DATA_KEY_STATUS, {}).get("battery", 0)
+            changed |= self._set_member(self.low_battery, wifi_sn, battery <= LOW_BATTERY_THRESHOLD)
+        changed |= self._set_member(self.unavailable, wifi_sn, not coordinator.api.last_request_ok)
+
+        alarm_since = int(dt_util.utcnow().timestamp()) - FLEET_ALARM_WINDOW
+        for record in coordinator.new_records:
+            if record.operation_type in ALARM_OPERATION_TYPES and record.timestamp >= alarm_since:
+                heapq.heappush(self._alarm_times, record.timestamp)
+                changed = True
+            elif (
+                record.operation_type in UNLOCK_OPERATION_TYPES
+                and record.operation_result == RESULT_SUCCESS
+                and record.timestamp >= self._today_start
+                and record.user in user_mapping
+            ):
+                self.unlocks_today[user_mapping[record.user]] += 1
+                changed = True
+
+        if changed:
+            async_dispatcher_send(self.hass, SIGNAL_FLEET_UPDATED)
+
+    @callback
+    def async_remove_lock(self, wifi_sn: str) -> None:
+        """门锁卸载时移除其状态计数"""
+        if self._set_member(self.low_battery, wifi_sn, False) | self._set_member(self.unavailable, wifi_sn, False):
+            async_dispatcher_send(self.hass, SIGNAL_FLEET_UPDATED)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """取消定时任务"""
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs = []
+
+    @staticmethod
+    def _set_member(members: Set[str], wifi_sn: str, present: bool) -> bool:
+        """设置集合成员，返回是否发生变化"""
+        if present == (wifi_sn in members):
+            return False
+        if present:
+            members.add(wifi_sn)
+        else:
+            members.discard(wifi_sn)
+        return True
+
+    @callback
+    def _async_expire_alarms(self, _now: Optional[datetime] = None) -> None:
+        """移除窗口外的报警"""
+        alarm_since = int(dt_util.utcnow().timestamp()) - FLEET_ALARM_WINDOW
+        expired = False
+        while self._alarm_times and self._alarm_times[0] < alarm_since:
+            heapq.heappop(self._alarm_times)
+            expired = True
+        if expired:
+            async_dispatcher_send(self.hass, SIGNAL_FLEET_UPDATED)
+
+    @callback
+    def _async_reset_daily(self, _now: Optional[datetime] = None) -> None:
+        """本地零点清零今日开锁次数"""
+        self._today_start = self._start_of_today()
+        self.unlocks_today.clear()
+        async_dispatcher_send(self.hass, SIGNAL_FLEET_UPDATED)
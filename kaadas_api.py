@@ -1,139 +1,261 @@
 """凯迪仕门锁API接口"""
 
+import hashlib
+import json
 import logging
 import aiohttp
 import asyncio
-from typing import Optional, Dict, Any
+from datetime import tzinfo
+from typing import Optional, Dict, Any, List, Tuple
+
+from .const import (
+    API_BASE_URL,
+    OPERATION_TYPES,
+    OPERATION_RESULTS,
+    UNLOCK_OPERATION_TYPES,
+    LOCK_OPERATION_TYPES,
+    RELEASE_OPERATION_TYPES,
+    ALARM_OPERATION_TYPES,
+    RESULT_SUCCESS,
+    RESULT_FAILURE,
+    REQUEST_TIMEOUT,
+    METRIC_POLLS,
+    METRIC_UNCHANGED,
+    METRIC_NOT_MODIFIED,
+    METRIC_ERRORS,
+)
+from .records import KaadasRecord
 
 _LOGGER = logging.getLogger(__name__)
 
+class KaadasAPIError(Exception):
+    """接口请求失败"""
+
+class KaadasCommandError(KaadasAPIError):
+    """门锁命令执行失败"""
+
 class KaadasAPI:
     """凯迪仕门锁API客户端"""
     
-    def __init__(self, token: str, wifi_sn: str, uid: str) -> None:
-        """初始化API客户端"""
+    def __init__(
+        self,
+        token: str,
+        wifi_sn: str,
+        uid: str,
+        base_url: str = API_BASE_URL,
+        session: Optional[aiohttp.ClientSession] = None,
+        timeout: float = REQUEST_TIMEOUT,
+        time_zone: Optional[tzinfo] = None,
+    ) -> None:
+        """初始化API客户端
+        
+        base_url 与 session 可替换为本地服务，便于在故障注入环境中运行客户端。
+        time_zone 为门锁所在时区，用于解释不带时区的操作时间，未指定时使用进程本地时区。
+        """
         self.token = token
         self.wifi_sn = wifi_sn
         self.uid = uid
-        self.base_url = "https://api.kaadas.com.cn/kaadas-app"
+        self.base_url = base_url.rstrip("/")
+        self._session = session
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self.time_zone = time_zone
+        # 上次成功响应的指纹与解析结果，用于跳过未变化的响应
+        self._etag: Optional[str] = None
+        self._last_digest: Optional[bytes] = None
+        self._last_status: Optional[Dict[str, Any]] = None
+        self.metrics: Dict[str, int] = {
+            METRIC_POLLS: 0,
+            METRIC_UNCHANGED: 0,
+            METRIC_NOT_MODIFIED: 0,
+            METRIC_ERRORS: 0,
+        }
+        # 最近一次状态请求是否成功，供熔断判断
+        self.last_request_ok = True
         
     async def async_get_lock_status(self) -> Dict[str, Any]:
-        """获取门锁状态"""
-        url = f"{self.base_url}/lock/getLockStatus"
-        headers = {
-            "Content-Type": "application/json",
-            "token": self.token,
-        }
+        """获取门锁状态
+        
+        响应未变化时直接返回上一次的解析结果（同一对象），调用方可据此跳过后续处理。
+        """
+        headers = {}
+        if self._etag and self._last_status is not None:
+            headers["If-None-Match"] = self._etag
         data = {
             "wifiSn": self.wifi_sn,
             "uid": self.uid,
         }
         
+        self.last_request_ok = False
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, headers=headers, json=data) as response:
-                    response.raise_for_status()
-                    result = await response.json()
-                    
-                    if result.get("code") == 0 and result.get("data"):
-                        return self._parse_lock_status(result["data"])
-                    
-                    _LOGGER.error("获取门锁状态失败: %s", result.get("message", "未知错误"))
-                    return {"last_text": "获取状态失败", "last_time": "", "last_user": "", "battery": 0}
-                    
+            status_code, etag, body = await self._async_post("lock/getLockStatus", data, headers)
+            self.metrics[METRIC_POLLS] += 1
+            
+            if status_code == 304 and self._last_status is not None:
+                self.metrics[METRIC_NOT_MODIFIED] += 1
+                self.last_request_ok = True
+                return self._last_status
+            
+            # 原始响应体指纹未变化时跳过解码与解析
+            digest = hashlib.blake2b(body, digest_size=16).digest()
+            if digest == self._last_digest and self._last_status is not None:
+                self.metrics[METRIC_UNCHANGED] += 1
+                self.last_request_ok = True
+                return self._last_status
+            
+            result = json.loads(body)
+            
+            if result.get("code") == 0 and result.get("data"):
+                status = self._parse_lock_status(result["data"])
+                self._etag = etag
+                self._last_digest = digest
+                self._last_status = status
+                self.last_request_ok = True
+                return status
+            
+            self.metrics[METRIC_ERRORS] += 1
+            _LOGGER.error("获取门锁状态失败: %s", result.get("message", "未知错误"))
+            return {"last_text": "获取状态失败", "last_time": "", "last_user": "", "battery": 0}
+            
+        except asyncio.TimeoutError:
+            self.metrics[METRIC_ERRORS] += 1
+            _LOGGER.error("API请求超时")
+            return {"last_text": "请求超时", "last_time": "", "last_user": "", "battery": 0}
         except aiohttp.ClientError as e:
+            self.metrics[METRIC_ERRORS] += 1
             _LOGGER.error("API请求失败: %s", str(e))
             return {"last_text": "连接失败", "last_time": "", "last_user": "", "battery": 0}
         except Exception as e:
+            self.metrics[METRIC_ERRORS] += 1
             _LOGGER.error("获取门锁状态发生未知错误: %s", str(e))
             return {"last_text": "未知错误", "last_time": "", "last_user": "", "battery": 0}
     
-    def _parse_lock_status(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """解析门锁状态数据"""
+    # 远程开锁/上锁接口路径按 lock/getLockStatus 的命名推测，尚未经官方文档或抓包确认；
+    # 若云端路径不同，命令会以 KaadasCommandError 失败而不会误报成功
+    async def async_unlock(self) -> None:
+        """远程开锁"""
+        await self._async_send_command("lock/openLock")
+    
+    async def async_lock(self) -> None:
+        """远程上锁"""
+        await self._async_send_command("lock/closeLock")
+    
+    async def _async_send_command(self, path: str) -> None:
+        """发送门锁命令，失败时抛出 KaadasCommandError"""
+        data = {
+            "wifiSn": self.wifi_sn,
+            "uid": self.uid,
+        }
+        await self._async_call(path, data, KaadasCommandError)
+    
+    async def async_get_records(self, page: int, page_size: int) -> List[KaadasRecord]:
+        """分页获取门锁记录(新记录在前)，失败时抛出 KaadasAPIError
+        
+        接口路径 lock/getRecordList 与分页参数同样为推测，尚未经确认。
+        """
+        data = {
+            "wifiSn": self.wifi_sn,
+            "uid": self.uid,
+            "page": page,
+            "pageSize": page_size,
+        }
+        result = await self._async_call("lock/getRecordList", data)
+        records = (result.get("data") or {}).get("recordList", [])
+        return [KaadasRecord.from_api(record, self.time_zone) for record in records]
+    
+    async def _async_call(
+        self, path: str, data: Dict[str, Any], error: type = KaadasAPIError
+    ) -> Dict[str, Any]:
+        """发送请求并返回 code 为0的响应，失败时抛出指定异常"""
         try:
-            # 提取电池信息
-            battery = data.get("battery", 0)
-            
-            # 提取最后一条记录
-            records = data.get("recordList", [])
-            last_record = records[0] if records else {}
-            
-            # 提取操作类型
-            operation_type = last_record.get("operationType", "")
-            operation_type_text = {
-                1: "指纹",
-                2: "密码",
-                3: "NFC",
-                4: "机械钥匙",
-                5: "APP",
-                6: "自动",
-                7: "胁迫指纹",
-                8: "童锁",
-                9: "上提反锁",
-                10: "门未关报警",
-                11: "撬锁报警",
-                12: "试错报警",
-                13: "低电量报警",
-                14: "电池耗尽",
-                15: "恢复出厂设置",
-                16: "用户添加",
-                17: "用户删除",
-                18: "用户修改",
-                19: "管理员添加",
-                20: "管理员删除",
-                21: "管理员修改",
-                22: "密码重置",
-                23: "指纹重置",
-                24: "NFC重置",
-                25: "报警解除",
-                26: "防猫眼锁定",
-                27: "防猫眼解锁",
-                28: "童锁锁定",
-                29: "童锁解锁",
-            }.get(operation_type, "未知")
-            
-            # 提取操作结果
-            operation_result = last_record.get("operationResult", "")
-            operation_result_text = {
-                1: "成功",
-                2: "失败",
-            }.get(operation_result, "未知")
-            
-            # 提取用户名
-            user_name = last_record.get("userName", "")
-            
-            # 提取操作时间
-            operation_time = last_record.get("operationTime", "")
-            
-            # 构建操作文本
-            if operation_type in [1, 2, 3, 4, 5]:
-                # 开锁操作
-                action_text = f"{operation_type_text}开锁"
-            elif operation_type in [9, 26, 28]:
-                # 锁定操作
-                action_text = f"{operation_type_text}"
-            elif operation_type in [27, 29]:
-                # 解锁操作
-                action_text = f"{operation_type_text}"
-            elif operation_type in [10, 11, 12, 13, 14]:
-                # 报警操作
-                action_text = f"{operation_type_text}"
-            else:
-                # 其他操作
-                action_text = f"{operation_type_text}"
-            
-            # 添加结果
-            if operation_result == 1:
-                action_text += "成功"
-            elif operation_result == 2:
-                action_text += "失败"
-            
-            return {
-                "last_text": action_text,
-                "last_time": operation_time,
-                "last_user": user_name,
-                "battery": battery,
-            }
-        except Exception as e:
-            _LOGGER.error("解析门锁状态失败: %s", str(e))
-            return {"last_text": "解析状态失败", "last_time": "", "last_user": "", "battery": 0}    
\ No newline at end of file
+            _, _, body = await self._async_post(path, data)
+            result = json.loads(body)
+        except asyncio.TimeoutError as e:
+            raise error("请求超时") from e
+        except (aiohttp.ClientError, ValueError) as e:
+            raise error(f"请求失败: {e}") from e
+        
+        if result.get("code") != 0:
+            raise error(result.get("message", "未知错误"))
+        return result
+    
+    async def _async_post(
+        self, path: str, data: Dict[str, Any], extra_headers: Optional[Dict[str, str]] = None
+    ) -> Tuple[int, Optional[str], bytes]:
+        """发送POST请求，返回状态码、ETag与原始响应体"""
+        url = f"{self.base_url}/{path}"
+        headers = {
+            "Content-Type": "application/json",
+            "token": self.token,
+            **(extra_headers or {}),
+        }
+        
+        if self._session is not None:
+            return await self._async_send(self._session, url, headers, data)
+        
+        async with aiohttp.ClientSession() as session:
+            return await self._async_send(session, url, headers, data)
+    
+    async def _async_send(
+        self, session: aiohttp.ClientSession, url: str, headers: Dict[str, str], data: Dict[str, Any]
+    ) -> Tuple[int, Optional[str], bytes]:
+        """在指定会话上发送请求"""
+        async with session.post(url, headers=headers, json=data, timeout=self._timeout) as response:
+            if response.status == 304:
+                return response.status, response.headers.get("ETag"), b""
+            response.raise_for_status()
+            body = await response.read()
+            return response.status, response.headers.get("ETag"), body
+    
+    def _parse_lock_status(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """解析门锁状态数据，数据格式异常时抛出的异常由调用方按请求失败处理"""
+        # 提取电池信息
+        battery = data.get("battery", 0)
+        
+        # 提取最后一条记录
+        records = data.get("recordList", [])
+        last_record = records[0] if records else {}
+        
+        # 提取操作类型
+        operation_type = last_record.get("operationType", "")
+        operation_type_text = OPERATION_TYPES.get(operation_type, "未知")
+        
+        # 提取操作结果
+        operation_result = last_record.get("operationResult", "")
+        operation_result_text = OPERATION_RESULTS.get(operation_result, "未知")
+        
+        # 提取用户名
+        user_name = last_record.get("userName", "")
+        
+        # 提取操作时间
+        operation_time = last_record.get("operationTime", "")
+        
+        # 构建操作文本
+        if operation_type in UNLOCK_OPERATION_TYPES:
+            # 开锁操作
+            action_text = f"{operation_type_text}开锁"
+        elif operation_type in LOCK_OPERATION_TYPES:
+            # 锁定操作
+            action_text = f"{operation_type_text}"
+        elif operation_type in RELEASE_OPERATION_TYPES:
+            # 解锁操作
+            action_text = f"{operation_type_text}"
+        elif operation_type in ALARM_OPERATION_TYPES:
+            # 报警操作
+            action_text = f"{operation_type_text}"
+        else:
+            # 其他操作
+            action_text = f"{operation_type_text}"
+        
+        # 添加结果
+        if operation_result == RESULT_SUCCESS:
+            action_text += "成功"
+        elif operation_result == RESULT_FAILURE:
+            action_text += "失败"
+        
+        return {
+            "last_text": action_text,
+            "last_time": operation_time,
+            "last_user": user_name,
+            "battery": battery,
+            "records": [KaadasRecord.from_api(record, self.time_zone) for record in records],
+        }
@@ -0,0 +1,107 @@
+"""凯迪仕门锁锁平台"""
+
+import logging
+from typing import Any, Optional
+from homeassistant.components.lock import LockEntity
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    COMMAND_LOCK,
+    COMMAND_UNLOCK,
+    METRIC_COMMAND_LATENCY,
+)
+from .kaadas_api import KaadasCommandError
+from . import KaadasDataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+async def async_setup_entry(
+    hass: HomeAssistant, entry: ConfigEntry, async_add_entities: AddEntitiesCallback
+) -> None:
+    """设置门锁实体"""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    
+    async_add_entities([KaadasLock(coordinator, entry)])
+
+class KaadasLock(CoordinatorEntity, LockEntity):
+    """凯迪仕门锁"""
+    
+    _attr_has_entity_name = True
+    _attr_name = "门锁"
+    
+    def __init__(self, coordinator: KaadasDataUpdateCoordinator, entry: ConfigEntry) -> None:
+        """初始化门锁"""
+        super().__init__(coordinator)
+        self.entry = entry
+        self._attr_unique_id = f"{entry.entry_id}_lock"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, entry.unique_id)},
+            "name": f"凯迪仕门锁 {entry.data.get('wifi_sn')}",
+            "manufacturer": "凯迪仕",
+            "model": "智能门锁",
+        }
+        # 命令执行期间的乐观状态，None 表示以门锁记录为准
+        self._optimistic_locked: Optional[bool] = None
+        # 最近一次下发的命令，只有它结束时才清除乐观状态
+        self._pending_command: Optional[object] = None
+        
+    @property
+    def available(self) -> bool:
+        """门锁是否可用"""
+        return self.coordinator.last_update_success
+        
+    @property
+    def is_locked(self) -> Optional[bool]:
+        """返回门锁是否已上锁"""
+        if self._optimistic_locked is not None:
+            return self._optimistic_locked
+        
+        return self.coordinator.lock_state.is_locked
+        
+    @property
+    def extra_state_attributes(self) -> dict:
+        """返回额外的状态属性"""
+        lock_state = self.coordinator.lock_state
+        return {
+            "命令确认耗时": self.coordinator.commands.metrics[METRIC_COMMAND_LATENCY],
+            "锁舌状态": lock_state.bolt,
+            "锁舌状态开始时间": (
+                dt_util.utc_from_timestamp(lock_state.bolt_since).isoformat() if lock_state.bolt_since else None
+            ),
+        }
+        
+    async def async_lock(self, **kwargs: Any) -> None:
+        """上锁"""
+        await self._async_command(COMMAND_LOCK, True)
+        
+    async def async_unlock(self, **kwargs: Any) -> None:
+        """开锁"""
+        await self._async_command(COMMAND_UNLOCK, False)
+        
+    async def _async_command(self, command: str, locked: bool) -> None:
+        """通过命令队列下发命令，执行期间显示乐观状态"""
+        pending = object()
+        self._pending_command = pending
+        self._optimistic_locked = locked
+        self._attr_is_locking = locked
+        self._attr_is_unlocking = not locked
+        self.async_write_ha_state()
+        
+        try:
+            await self.coordinator.commands.async_submit(command)
+        except KaadasCommandError as e:
+            raise HomeAssistantError(f"门锁命令执行失败: {e}") from e
+        finally:
+            # 之后下发的命令仍在执行时保留其乐观状态
+            if self._pending_command is pending:
+                self._pending_command = None
+                self._optimistic_locked = None
+                self._attr_is_locking = False
+                self._attr_is_unlocking = False
+                self.async_write_ha_state()
@@ -0,0 +1,137 @@
+"""凯迪仕门锁 Prometheus 指标"""
+
+import bisect
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import (
+    DOMAIN,
+    DATA_KEY_STATUS,
+    CONF_ENABLE_METRICS,
+    METRICS_URL,
+    POLL_LATENCY_BUCKETS,
+    OPERATION_TYPES,
+    OPERATION_RESULTS,
+    METRIC_POLLS,
+    METRIC_UNCHANGED,
+    METRIC_NOT_MODIFIED,
+    METRIC_ERRORS,
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class LatencyHistogram:
+    """累计耗时直方图，记录时只做一次二分查找"""
+
+    def __init__(self, buckets: Sequence[float] = POLL_LATENCY_BUCKETS) -> None:
+        """初始化直方图"""
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """记录一次耗时(秒)"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """返回 Prometheus 格式的累计桶 (le, 计数)"""
+        result = []
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append(("+Inf" if bound == float("inf") else repr(float(bound)), total))
+        return result
+
+class EventCounter(Counter):
+    """按 (操作类型, 操作结果) 统计的事件数"""
+
+    def add(self, records) -> None:
+        """累加一批新增记录"""
+        for record in records:
+            self[(record.operation_type, record.operation_result)] += 1
+
+def _escape(value: str) -> str:
+    """转义标签值"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+class KaadasMetricsView(HomeAssistantView):
+    """以 Prometheus 文本格式导出门锁指标，只读取内存中的计数，不触发云端请求"""
+
+    url = METRICS_URL
+    name = f"api:{DOMAIN}:metrics"
+    requires_auth = True
+
+    async def get(self, request: web.Request) -> web.Response:
+        """返回全部已启用指标的门锁的指标"""
+        hass = request.app["hass"]
+        domain_data = hass.data.get(DOMAIN, {})
+        coordinators = []
+        for entry in hass.config_entries.async_entries(DOMAIN):
+            coordinator = domain_data.get(entry.entry_id)
+            if entry.options.get(CONF_ENABLE_METRICS) and isinstance(coordinator, DataUpdateCoordinator):
+                coordinators.append(coordinator)
+
+        if not coordinators:
+            return web.Response(status=404)
+
+        return web.Response(body=render_metrics(coordinators).encode(), headers={"Content-Type": CONTENT_TYPE})
+
+def render_metrics(coordinators) -> str:
+    """生成所有门锁的指标文本"""
+    families = {
+        "battery_percent": ("gauge", "电池电量", []),
+        "up": ("gauge", "最近一次云端请求是否成功", []),
+        "last_event_timestamp_seconds": ("gauge", "最新记录的时间戳", []),
+        "events_total": ("counter", "按类型与结果统计的新增记录数", []),
+        "polls_total": ("counter", "状态轮询次数", []),
+        "polls_unchanged_total": ("counter", "响应未变化的轮询次数", []),
+        "poll_errors_total": ("counter", "状态请求失败次数", []),
+        "circuit_breaker_open": ("gauge", "熔断是否开启", []),
+        "poll_duration_seconds": ("histogram", "状态轮询耗时", []),
+    }
+
+    for coordinator in coordinators:
+        label = f'wifi_sn="{_escape(coordinator.api.wifi_sn)}"'
+        status = (coordinator.data or {}).get(DATA_KEY_STATUS, {})
+        api_metrics = coordinator.api.metrics
+
+        # 请求失败时协调器保留上一次成功的数据，导出的即为最后一次有效电量；尚无有效数据时不导出
+        battery = status.get("battery")
+        if battery is not None:
+            families["battery_percent"][2].append(f"{{{label}}} {battery}")
+        families["up"][2].append(f"{{{label}}} {int(coordinator.api.last_request_ok)}")
+        families["last_event_timestamp_seconds"][2].append(f"{{{label}}} {coordinator.records.high_water_mark}")
+        for (operation_type, result), count in coordinator.event_counts.items():
+            families["events_total"][2].append(
+                f'{{{label},operation_type="{_escape(OPERATION_TYPES.get(operation_type, operation_type))}",'
+                f'result="{_escape(OPERATION_RESULTS.get(result, result))}"}} {count}'
+            )
+        families["polls_total"][2].append(f"{{{label}}} {api_metrics[METRIC_POLLS]}")
+        families["polls_unchanged_total"][2].append(
+            f"{{{label}}} {api_metrics[METRIC_UNCHANGED] + api_metrics[METRIC_NOT_MODIFIED]}"
+        )
+        families["poll_errors_total"][2].append(f"{{{label}}} {api_metrics[METRIC_ERRORS]}")
+        families["circuit_breaker_open"][2].append(f"{{{label}}} {int(coordinator.breaker_open)}")
+
+        histogram = coordinator.poll_latency
+        samples = families["poll_duration_seconds"][2]
+        for bound, count in histogram.cumulative():
+            samples.append(f'_bucket{{{label},le="{bound}"}} {count}')
+        samples.append(f"_sum{{{label}}} {histogram.sum}")
+        samples.append(f"_count{{{label}}} {histogram.count}")
+
+    lines = []
+    for name, (metric_type, description, samples) in families.items():
+        metric = f"{DOMAIN}_{name}"
+        lines.append(f"# HELP {metric} {description}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        lines.extend(f"{metric}{sample}" for sample in samples)
+    lines.append("")
+    return "\n".join(lines)
@@ -0,0 +1,191 @@
+"""凯迪仕门锁在家状态推断"""
+
+import logging
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect, async_dispatcher_send
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    DATA_PRESENCE,
+    CONF_USER_MAPPING,
+    CONF_PRESENCE_TIMEOUT,
+    DEFAULT_PRESENCE_TIMEOUT,
+    SIGNAL_NEW_RECORDS,
+    SIGNAL_PRESENCE_UPDATED,
+    UNLOCK_OPERATION_TYPES,
+    RESULT_SUCCESS,
+)
+from .records import KaadasRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+@callback
+def async_get_presence(hass: HomeAssistant) -> "KaadasPresenceModel":
+    """返回全部门锁共享的在家状态模型"""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if DATA_PRESENCE not in domain_data:
+        domain_data[DATA_PRESENCE] = KaadasPresenceModel(hass)
+    return domain_data[DATA_PRESENCE]
+
+class KaadasPresence:
+    """单个本地用户的在家状态"""
+
+    __slots__ = ("name", "home", "last_seen", "last_wifi_sn", "last_username", "owner_entry_id", "unsub_decay")
+
+    def __init__(self, name: str) -> None:
+        """初始化为离家状态"""
+        self.name = name
+        self.home = False
+        self.last_seen = 0
+        self.last_wifi_sn: Optional[str] = None
+        self.last_username: Optional[str] = None
+        self.owner_entry_id: Optional[str] = None
+        self.unsub_decay: Optional[CALLBACK_TYPE] = None
+
+class KaadasPresenceModel:
+    """合并全部门锁开锁记录的在家状态模型
+
+    通过 (wifi_sn, 凯迪仕用户名) 索引直接定位到本地用户，每条记录 O(1) 处理；
+    用户在最近一次成功开锁后的一段时间内视为在家，到期由定时器转为离家。
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """初始化模型并订阅新增记录"""
+        self.hass = hass
+        self.persons: Dict[str, KaadasPresence] = {}
+        self._index: Dict[Tuple[str, str], KaadasPresence] = {}
+        self._entries: Dict[str, ConfigEntry] = {}
+        # 各配置项追踪平台的实体添加回调与实体工厂，用于为尚无实体的用户创建实体
+        self._platforms: Dict[str, Tuple[AddEntitiesCallback, Callable[[KaadasPresence], Entity]]] = {}
+        self._unsub = async_dispatcher_connect(hass, SIGNAL_NEW_RECORDS, self.async_add_records)
+
+    @callback
+    def async_register_lock(self, entry: ConfigEntry, wifi_sn: str) -> None:
+        """按配置项当前的用户映射为一把门锁建立索引，映射修改后再次调用即可重建"""
+        self._async_drop_index(wifi_sn)
+        self._entries[wifi_sn] = entry
+        for kaadas_username, local_name in entry.data.get(CONF_USER_MAPPING, {}).items():
+            person = self.persons.get(local_name)
+            if person is None:
+                person = self.persons[local_name] = KaadasPresence(local_name)
+            self._index[(wifi_sn, kaadas_username)] = person
+        self._async_prune()
+        self._async_assign_owners()
+
+    @callback
+    def async_remove_lock(self, entry_id: str, wifi_sn: str) -> None:
+        """门锁卸载时移除索引，该配置项创建的实体交由仍映射该用户的其他配置项重新创建"""
+        self._async_drop_index(wifi_sn)
+        self._entries.pop(wifi_sn, None)
+        self._platforms.pop(entry_id, None)
+        for person in self.persons.values():
+            if person.owner_entry_id == entry_id:
+                person.owner_entry_id = None
+        self._async_prune()
+        self._async_assign_owners()
+
+    @callback
+    def async_register_platform(
+        self,
+        entry_id: str,
+        async_add_entities: AddEntitiesCallback,
+        entity_factory: Callable[[KaadasPresence], Entity],
+    ) -> None:
+        """登记配置项的追踪平台，并为其映射的尚无实体的用户创建实体"""
+        self._platforms[entry_id] = (async_add_entities, entity_factory)
+        self._async_assign_owners()
+
+    @callback
+    def _async_assign_owners(self) -> None:
+        """每个用户只由一个映射了该用户且已设置追踪平台的配置项创建实体"""
+        created: Dict[str, List[Entity]] = {}
+        for (wifi_sn, _), person in self._index.items():
+            entry_id = self._entries[wifi_sn].entry_id
+            if person.owner_entry_id is not None or entry_id not in self._platforms:
+                continue
+            person.owner_entry_id = entry_id
+            created.setdefault(entry_id, []).append(self._platforms[entry_id][1](person))
+
+        for entry_id, entities in created.items():
+            self._platforms[entry_id][0](entities)
+
+    @callback
+    def _async_prune(self) -> None:
+        """移除不再被任何门锁映射的用户，并通知其实体移除自身"""
+        referenced = {id(person) for person in self._index.values()}
+        for name, person in list(self.persons.items()):
+            if id(person) not in referenced:
+                self._async_cancel_decay(person)
+                del self.persons[name]
+                async_dispatcher_send(self.hass, SIGNAL_PRESENCE_UPDATED.format(name))
+
+    @callback
+    def async_add_records(self, wifi_sn: str, records: Iterable[KaadasRecord]) -> None:
+        """处理一把门锁的新增记录，只通知状态有变化的用户"""
+        entry = self._entries.get(wifi_sn)
+        if entry is None:
+            return
+
+        timeout = entry.options.get(CONF_PRESENCE_TIMEOUT, DEFAULT_PRESENCE_TIMEOUT) * 60
+        now = dt_util.utcnow().timestamp()
+        changed: Set[str] = set()
+        for record in records:
+            if record.operation_type not in UNLOCK_OPERATION_TYPES or record.operation_result != RESULT_SUCCESS:
+                continue
+            person = self._index.get((wifi_sn, record.user))
+            if person is None or record.timestamp <= person.last_seen:
+                continue
+
+            person.last_seen = record.timestamp
+            person.last_wifi_sn = wifi_sn
+            person.last_username = record.user
+            changed.add(person.name)
+
+            # 历史记录只更新最后开锁信息，已过期的不再视为在家
+            remaining = record.timestamp + timeout - now
+            self._async_cancel_decay(person)
+            if remaining > 0:
+                person.home = True
+                person.unsub_decay = async_call_later(self.hass, remaining, partial(self._async_decay, person))
+            else:
+                person.home = False
+
+        for name in changed:
+            async_dispatcher_send(self.hass, SIGNAL_PRESENCE_UPDATED.format(name))
+
+    @callback
+    def async_shutdown(self) -> None:
+        """取消订阅与定时器"""
+        self._unsub()
+        for person in self.persons.values():
+            self._async_cancel_decay(person)
+
+    @callback
+    def _async_drop_index(self, wifi_sn: str) -> None:
+        """移除一把门锁的索引项"""
+        keys: List[Tuple[str, str]] = [key for key in self._index if key[0] == wifi_sn]
+        for key in keys:
+            del self._index[key]
+
+    @staticmethod
+    def _async_cancel_decay(person: KaadasPresence) -> None:
+        """取消用户的离家定时器"""
+        if person.unsub_decay is not None:
+            person.unsub_decay()
+            person.unsub_decay = None
+
+    @callback
+    def _async_decay(self, person: KaadasPresence, _now: Optional[datetime] = None) -> None:
+        """开锁后超过设定时长未再出现，转为离家"""
+        person.unsub_decay = None
+        person.home = False
+        async_dispatcher_send(self.hass, SIGNAL_PRESENCE_UPDATED.format(person.name))
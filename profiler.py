@@ -0,0 +1,203 @@
+"""凯迪仕门锁刷新周期性能分析"""
+
+import asyncio
+import cProfile
+import io
+import logging
+import pstats
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    SERVICE_PROFILE,
+    PROFILE_DEFAULT_CYCLES,
+    PROFILE_MAX_CYCLES,
+    PROFILE_TOP,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PROFILE_SCHEMA = vol.Schema({
+    vol.Optional("wifi_sn"): cv.string,
+    vol.Optional("cycles", default=PROFILE_DEFAULT_CYCLES): vol.All(
+        vol.Coerce(int), vol.Range(min=1, max=PROFILE_MAX_CYCLES)
+    ),
+})
+
+class ProfileSession:
+    """一次性能分析会话
+
+    只在会话期间给目标协调器的实例替换 _async_refresh，会话结束后移除，
+    未分析时刷新路径没有任何额外开销。分析覆盖整个刷新周期：HTTP 请求、
+    解码、_parse_lock_status、监听器通知与实体状态写入。
+    cProfile 按线程统计，刷新等待期间事件循环中运行的其他任务也会被计入。
+    """
+
+    def __init__(self, coordinators: List[DataUpdateCoordinator], cycles: int) -> None:
+        """初始化会话"""
+        self.coordinators = coordinators
+        self.cycles = cycles
+        self.profiler = cProfile.Profile()
+        self.completed: Dict[str, int] = {coordinator.api.wifi_sn: 0 for coordinator in coordinators}
+        self.done = asyncio.Event()
+        self.started_tracemalloc = False
+        self.snapshot_before = None
+        self.snapshot_after = None
+        self.elapsed = 0.0
+        self._active = 0
+
+    @callback
+    def async_start(self) -> None:
+        """安装刷新包装并开始记录内存分配"""
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracemalloc = True
+        self.snapshot_before = tracemalloc.take_snapshot()
+
+        for coordinator in self.coordinators:
+            coordinator._async_refresh = self._wrap(coordinator, coordinator._async_refresh)
+
+    @callback
+    def async_stop(self) -> None:
+        """移除刷新包装并停止记录，会话被取消时同样会调用，保证不遗留内存追踪"""
+        for coordinator in self.coordinators:
+            coordinator.__dict__.pop("_async_refresh", None)
+        if self._active:
+            self.profiler.disable()
+            self._active = 0
+        if self.snapshot_after is None and tracemalloc.is_tracing():
+            self.snapshot_after = tracemalloc.take_snapshot()
+        if self.started_tracemalloc:
+            tracemalloc.stop()
+            self.started_tracemalloc = False
+
+    def _wrap(self, coordinator: DataUpdateCoordinator, refresh):
+        """返回带分析的刷新函数"""
+        wifi_sn = coordinator.api.wifi_sn
+
+        async def profiled_refresh(*args: Any, **kwargs: Any) -> None:
+            """分析一次刷新周期"""
+            if self.done.is_set() or self.completed[wifi_sn] >= self.cycles:
+                return await refresh(*args, **kwargs)
+
+            if not self._active:
+                try:
+                    self.profiler.enable()
+                except ValueError:
+                    # 其他分析工具(如 Home Assistant 的 profiler 集成)正在运行
+                    _LOGGER.error("无法启动 cProfile，已有其他分析工具在运行")
+                    self.done.set()
+                    return await refresh(*args, **kwargs)
+            self._active += 1
+            started = time.perf_counter()
+            try:
+                return await refresh(*args, **kwargs)
+            finally:
+                self.elapsed += time.perf_counter() - started
+                self._active -= 1
+                if not self._active:
+                    self.profiler.disable()
+                self.completed[wifi_sn] += 1
+                if all(count >= self.cycles for count in self.completed.values()):
+                    self.done.set()
+
+        return profiled_refresh
+
+    def build_report(self, path: str) -> Dict[str, Any]:
+        """生成报告文件并返回摘要(在执行器中运行)"""
+        allocations = self.snapshot_after.compare_to(self.snapshot_before, "lineno")[:PROFILE_TOP]
+
+        stats = pstats.Stats(self.profiler)
+        top_functions = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)[:PROFILE_TOP]
+
+        text = io.StringIO()
+        text.write(f"刷新周期: {self.completed}\n刷新耗时合计: {self.elapsed:.3f} 秒\n\n")
+        pstats.Stats(self.profiler, stream=text).sort_stats("cumulative").print_stats(50)
+        text.write("\n内存分配变化(按行):\n")
+        for stat in allocations:
+            text.write(f"{stat}\n")
+
+        with open(path, "w", encoding="utf-8") as file:
+            file.write(text.getvalue())
+        self.profiler.dump_stats(f"{path[:-4]}.prof")
+
+        return {
+            "report": path,
+            "cycles": self.completed,
+            "elapsed": round(self.elapsed, 4),
+            "top_functions": [
+                {
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "total_time": round(total_time, 6),
+                    "cumulative_time": round(cumulative_time, 6),
+                }
+                for (filename, line, name), (_, calls, total_time, cumulative_time, _) in top_functions
+            ],
+            "top_allocations": [
+                {
+                    "location": str(stat.traceback[0]),
+                    "size_diff_kib": round(stat.size_diff / 1024, 2),
+                    "count_diff": stat.count_diff,
+                }
+                for stat in allocations
+            ],
+        }
+
+@callback
+def async_register_profile_service(hass: HomeAssistant) -> None:
+    """注册性能分析服务"""
+    active_session: List[ProfileSession] = []
+
+    async def async_handle_profile(call: ServiceCall) -> ServiceResponse:
+        """分析接下来 N 个刷新周期"""
+        if active_session:
+            raise HomeAssistantError("已有性能分析正在进行")
+
+        wifi_sn = call.data.get("wifi_sn")
+        coordinators = [
+            coordinator
+            for coordinator in hass.data.get(DOMAIN, {}).values()
+            if isinstance(coordinator, DataUpdateCoordinator)
+            and (wifi_sn is None or coordinator.api.wifi_sn == wifi_sn)
+        ]
+        if not coordinators:
+            raise HomeAssistantError("没有匹配的门锁")
+
+        cycles = call.data["cycles"]
+        session = ProfileSession(coordinators, cycles)
+        # 刷新间隔可能因熔断而变长，超时按最长间隔估算
+        longest_interval = max(coordinator.update_interval.total_seconds() for coordinator in coordinators)
+        timeout = longest_interval * (cycles + 1) + 60
+
+        active_session.append(session)
+        session.async_start()
+        try:
+            await asyncio.wait_for(session.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            _LOGGER.warning("性能分析在 %s 秒内未完成全部周期，按已完成的周期生成报告", timeout)
+        finally:
+            session.async_stop()
+            active_session.clear()
+
+        path = hass.config.path(f"{DOMAIN}_profile_{dt_util.now().strftime('%Y%m%d_%H%M%S')}.txt")
+        summary = await hass.async_add_executor_job(session.build_report, path)
+        _LOGGER.info("性能分析报告已写入 %s", path)
+        return summary
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_PROFILE,
+        async_handle_profile,
+        schema=PROFILE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
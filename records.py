@@ -0,0 +1,200 @@
+"""凯迪仕门锁记录的紧凑内存表示"""
+
+import sys
+from collections import deque
+from datetime import datetime, tzinfo
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from .const import OPERATION_TYPES, OPERATION_RESULTS, RECORD_BUDGET_BYTES
+
+# 单条记录的内存(字节)：__slots__ 对象 + 时间戳整数 + deque 槽位
+# 操作类型与结果为小整数(解释器缓存)，不单独计入
+RECORD_SIZE_ESTIMATE = 112
+# 缓冲区固定开销：对象本身、deque 首个数据块、去重键集合与用户名计数
+BUFFER_OVERHEAD = 1536
+# 每个不同用户名在字符串本身之外的开销：intern 表与用户名计数中的条目
+USER_ENTRY_OVERHEAD = 96
+
+_TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y/%m/%d %H:%M:%S")
+
+def parse_timestamp(value: Any, time_zone: Optional[tzinfo] = None) -> int:
+    """将接口返回的操作时间转换为秒级时间戳，无法解析时返回0
+
+    不带时区的时间字符串按 time_zone 解释，未指定时使用进程本地时区。
+    """
+    if isinstance(value, (int, float)):
+        # 毫秒时间戳
+        return int(value / 1000) if value > 10**11 else int(value)
+    if isinstance(value, str) and value:
+        if value.isdigit():
+            return parse_timestamp(int(value))
+        for fmt in _TIME_FORMATS:
+            try:
+                parsed = datetime.strptime(value, fmt)
+            except ValueError:
+                continue
+            if time_zone is not None:
+                parsed = parsed.replace(tzinfo=time_zone)
+            return int(parsed.timestamp())
+    return 0
+
+def _as_int(value: Any) -> int:
+    """将接口字段转换为整数，无法转换时返回0"""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+class KaadasRecord:
+    """单条门锁操作记录"""
+    
+    __slots__ = ("timestamp", "operation_type", "operation_result", "user")
+    
+    def __init__(self, timestamp: int, operation_type: int, operation_result: int, user: str) -> None:
+        """初始化记录"""
+        self.timestamp = timestamp
+        self.operation_type = operation_type
+        self.operation_result = operation_result
+        self.user = sys.intern(user) if user else ""
+    
+    @classmethod
+    def from_api(cls, raw: Dict[str, Any], time_zone: Optional[tzinfo] = None) -> "KaadasRecord":
+        """从接口返回的 recordList 元素构建记录"""
+        return cls(
+            parse_timestamp(raw.get("operationTime"), time_zone),
+            _as_int(raw.get("operationType")),
+            _as_int(raw.get("operationResult")),
+            raw.get("userName") or "",
+        )
+    
+    @property
+    def key(self) -> Tuple[int, int, int, str]:
+        """返回用于去重的记录键"""
+        return (self.timestamp, self.operation_type, self.operation_result, self.user)
+    
+    @property
+    def type_text(self) -> str:
+        """返回操作类型文本"""
+        return OPERATION_TYPES.get(self.operation_type, "未知")
+    
+    @property
+    def result_text(self) -> str:
+        """返回操作结果文本"""
+        return OPERATION_RESULTS.get(self.operation_result, "未知")
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """返回可序列化的字典表示"""
+        return {
+            "timestamp": self.timestamp,
+            "operation_type": self.operation_type,
+            "operation_type_text": self.type_text,
+            "operation_result": self.operation_result,
+            "operation_result_text": self.result_text,
+            "user": self.user,
+        }
+    
+    def __repr__(self) -> str:
+        """返回调试表示"""
+        return f"KaadasRecord({self.timestamp}, {self.type_text}, {self.result_text}, {self.user!r})"
+
+class KaadasRecordBuffer:
+    """单把门锁的记录环形缓冲区，内存占用受预算约束
+    
+    记录与其引用的不同用户名一并计入占用，超出预算时淘汰最旧的记录。
+    每次轮询只能看到接口返回的最近若干条记录，与已有记录不衔接的批次之前可能有遗漏，
+    coverage 给出缓冲区能保证不缺记录的时间范围。
+    """
+    
+    def __init__(self, budget_bytes: int = RECORD_BUDGET_BYTES) -> None:
+        """初始化缓冲区"""
+        self.budget_bytes = budget_bytes
+        self.used_bytes = BUFFER_OVERHEAD
+        self._records: Deque[KaadasRecord] = deque()
+        # 缓冲区内各用户名的记录数，最后一条记录淘汰时释放用户名的占用
+        self._user_counts: Dict[str, int] = {}
+        self.high_water_mark = 0
+        # 时间戳等于高水位的记录键，用于同一秒内的去重
+        self._boundary_keys: Set[Tuple[int, int, int, str]] = set()
+        # 从该时间戳起到高水位的记录都已写入，None 表示尚无保证
+        self.covered_since: Optional[int] = None
+    
+    def __len__(self) -> int:
+        """返回保留的记录数"""
+        return len(self._records)
+    
+    def __iter__(self):
+        """按时间从旧到新遍历记录"""
+        return iter(self._records)
+    
+    def __reversed__(self):
+        """按时间从新到旧遍历记录"""
+        return reversed(self._records)
+    
+    @property
+    def coverage(self) -> Optional[Tuple[int, int]]:
+        """返回缓冲区完整保留全部记录的时间范围 [起, 止]，没有时返回 None"""
+        if self.covered_since is None or self.covered_since > self.high_water_mark:
+            return None
+        return (self.covered_since, self.high_water_mark)
+    
+    @property
+    def latest(self) -> Optional[KaadasRecord]:
+        """返回最新一条记录"""
+        return self._records[-1] if self._records else None
+    
+    def ingest(self, records: Iterable[KaadasRecord]) -> List[KaadasRecord]:
+        """写入接口返回的记录(新记录在前)，返回按时间排序的新增记录"""
+        records = sorted(records, key=lambda item: item.timestamp)
+        # 批次最旧的记录晚于高水位时，两次轮询之间的记录可能未全部返回，完整范围从本批开始
+        if records and (self.covered_since is None or records[0].timestamp > self.high_water_mark):
+            self.covered_since = records[0].timestamp
+        
+        new_records = []
+        for record in records:
+            if record.timestamp < self.high_water_mark:
+                continue
+            if record.timestamp > self.high_water_mark:
+                self.high_water_mark = record.timestamp
+                self._boundary_keys = set()
+            elif record.key in self._boundary_keys:
+                continue
+            self._boundary_keys.add(record.key)
+            new_records.append(record)
+        
+        for record in new_records:
+            self._append(record)
+        
+        return new_records
+    
+    def _append(self, record: KaadasRecord) -> None:
+        """追加一条记录，超出预算时淘汰最旧的记录(至少保留最新一条)"""
+        self._records.append(record)
+        self.used_bytes += RECORD_SIZE_ESTIMATE
+        count = self._user_counts.get(record.user, 0)
+        if not count:
+            self.used_bytes += sys.getsizeof(record.user) + USER_ENTRY_OVERHEAD
+        self._user_counts[record.user] = count + 1
+        
+        while self.used_bytes > self.budget_bytes and len(self._records) > 1:
+            oldest = self._records.popleft()
+            # 同一秒内可能还有未淘汰的记录，完整范围从下一秒开始
+            self.covered_since = max(self.covered_since or 0, oldest.timestamp + 1)
+            self.used_bytes -= RECORD_SIZE_ESTIMATE
+            count = self._user_counts[oldest.user] - 1
+            if count:
+                self._user_counts[oldest.user] = count
+            else:
+                del self._user_counts[oldest.user]
+                self.used_bytes -= sys.getsizeof(oldest.user) + USER_ENTRY_OVERHEAD
+    
+    def checkpoint(self) -> Dict[str, Any]:
+        """返回可序列化的去重位置"""
+        return {
+            "high_water_mark": self.high_water_mark,
+            "keys": [list(key) for key in self._boundary_keys],
+        }
+    
+    def restore(self, checkpoint: Dict[str, Any]) -> None:
+        """从 checkpoint() 的结果恢复去重位置"""
+        self.high_water_mark = int(checkpoint.get("high_water_mark", 0))
+        self._boundary_keys = {tuple(key) for key in checkpoint.get("keys", ())}
@@ -7,13 +7,15 @@ from homeassistant.components.sensor import (
     SensorStateClass,
 )
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.entity import EntityCategory
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
 from homeassistant.const import PERCENTAGE, DEVICE_CLASS_BATTERY
 
-from .const import DOMAIN, DATA_KEY_STATUS
+from .const import DOMAIN, DATA_KEY_STATUS, LOW_BATTERY_THRESHOLD, SIGNAL_FLEET_UPDATED
+from .fleet import KaadasFleetStats, async_get_fleet
+from .entity import KaadasCoordinatorEntity
 from . import KaadasDataUpdateCoordinator
 
 _LOGGER = logging.getLogger(__name__)
@@ -33,8 +35,21 @@ async def async_setup_entry(
     ]
     
     async_add_entities(entities)
+    
+    # 汇总实体只由一个配置项创建，该配置项卸载后由其余配置项接管
+    fleet = async_get_fleet(hass)
+    fleet.async_register_platform(
+        entry.entry_id,
+        async_add_entities,
+        lambda: [
+            KaadasFleetLowBatterySensor(fleet),
+            KaadasFleetUnavailableSensor(fleet),
+            KaadasFleetAlarmSensor(fleet),
+            KaadasFleetUnlocksTodaySensor(fleet),
+        ],
+    )
 
-class KaadasBatterySensor(CoordinatorEntity, SensorEntity):
+class KaadasBatterySensor(KaadasCoordinatorEntity, SensorEntity):
     """电池电量传感器"""
     
     _attr_has_entity_name = True
@@ -65,12 +80,13 @@ class KaadasBatterySensor(CoordinatorEntity, SensorEntity):
         """返回电池电量"""
         return self.coordinator.data.get(DATA_KEY_STATUS, {}).get("battery", 0)
 
-class KaadasLastActionSensor(CoordinatorEntity, SensorEntity):
+class KaadasLastActionSensor(KaadasCoordinatorEntity, SensorEntity):
     """最后操作传感器"""
     
     _attr_has_entity_name = True
     _attr_name = "最后操作"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
     
     def __init__(self, coordinator: KaadasDataUpdateCoordinator, entry: ConfigEntry) -> None:
         """初始化传感器"""
@@ -94,12 +110,13 @@ class KaadasLastActionSensor(CoordinatorEntity, SensorEntity):
         """返回最后操作"""
         return self.coordinator.data.get(DATA_KEY_STATUS, {}).get("last_text", "")
 
-class KaadasLastUserSensor(CoordinatorEntity, SensorEntity):
+class KaadasLastUserSensor(KaadasCoordinatorEntity, SensorEntity):
     """最后操作用户传感器"""
     
     _attr_has_entity_name = True
     _attr_name = "最后操作用户"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
     
     def __init__(self, coordinator: KaadasDataUpdateCoordinator, entry: ConfigEntry) -> None:
         """初始化传感器"""
@@ -123,12 +140,13 @@ class KaadasLastUserSensor(CoordinatorEntity, SensorEntity):
         """返回最后操作用户"""
         return self.coordinator.data.get(DATA_KEY_STATUS, {}).get("last_user", "")
 
-class KaadasBatteryStatusSensor(CoordinatorEntity, SensorEntity):
+class KaadasBatteryStatusSensor(KaadasCoordinatorEntity, SensorEntity):
     """电池状态传感器"""
     
     _attr_has_entity_name = True
     _attr_name = "电池状态"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
     
     def __init__(self, coordinator: KaadasDataUpdateCoordinator, entry: ConfigEntry) -> None:
         """初始化传感器"""
@@ -154,19 +172,20 @@ class KaadasBatteryStatusSensor(CoordinatorEntity, SensorEntity):
         
         if battery <= 10:
             return "电量极低"
-        elif battery <= 20:
+        elif battery <= LOW_BATTERY_THRESHOLD:
             return "电量低"
         elif battery <= 80:
             return "电量中等"
         else:
             return "电量充足"
 
-class KaadasOperationTypeSensor(CoordinatorEntity, SensorEntity):
+class KaadasOperationTypeSensor(KaadasCoordinatorEntity, SensorEntity):
     """操作类型传感器"""
     
     _attr_has_entity_name = True
     _attr_name = "操作类型"
     _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_entity_registry_enabled_default = False
     
     def __init__(self, coordinator: KaadasDataUpdateCoordinator, entry: ConfigEntry) -> None:
         """初始化传感器"""
@@ -201,4 +220,105 @@ class KaadasOperationTypeSensor(CoordinatorEntity, SensorEntity):
         elif "APP" in last_text:
             return "APP"
         else:
-            return "未知"    
\ No newline at end of file
+            return "未知"
+
+class KaadasFleetSensor(SensorEntity):
+    """门锁汇总传感器基类，随汇总统计的变化信号更新"""
+    
+    _attr_has_entity_name = True
+    _attr_should_poll = False
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    
+    def __init__(self, fleet: KaadasFleetStats, key: str) -> None:
+        """初始化传感器"""
+        self.fleet = fleet
+        self._attr_unique_id = f"{DOMAIN}_fleet_{key}"
+        self._attr_device_info = {
+            "identifiers": {(DOMAIN, "fleet")},
+            "name": "凯迪仕门锁汇总",
+            "manufacturer": "凯迪仕",
+            "model": "门锁汇总",
+        }
+        
+    async def async_added_to_hass(self) -> None:
+        """订阅汇总统计的变化"""
+        self.async_on_remove(
+            async_dispatcher_connect(self.hass, SIGNAL_FLEET_UPDATED, self._async_handle_update)
+        )
+        
+    @callback
+    def _async_handle_update(self) -> None:
+        """汇总统计变化时写入状态"""
+        self.async_write_ha_state()
+
+class KaadasFleetLowBatterySensor(KaadasFleetSensor):
+    """低电量门锁数传感器"""
+    
+    _attr_name = "低电量门锁数"
+    
+    def __init__(self, fleet: KaadasFleetStats) -> None:
+        """初始化传感器"""
+        super().__init__(fleet, "low_battery")
+        
+    @property
+    def native_value(self) -> int:
+        """返回低电量门锁数"""
+        return len(self.fleet.low_battery)
+        
+    @property
+    def extra_state_attributes(self) -> dict:
+        """返回低电量门锁列表"""
+        return {"门锁": sorted(self.fleet.low_battery)}
+
+class KaadasFleetUnavailableSensor(KaadasFleetSensor):
+    """不可用门锁数传感器"""
+    
+    _attr_name = "不可用门锁数"
+    
+    def __init__(self, fleet: KaadasFleetStats) -> None:
+        """初始化传感器"""
+        super().__init__(fleet, "unavailable")
+        
+    @property
+    def native_value(self) -> int:
+        """返回不可用门锁数"""
+        return len(self.fleet.unavailable)
+        
+    @property
+    def extra_state_attributes(self) -> dict:
+        """返回不可用门锁列表"""
+        return {"门锁": sorted(self.fleet.unavailable)}
+
+class KaadasFleetAlarmSensor(KaadasFleetSensor):
+    """最近一小时报警次数传感器"""
+    
+    _attr_name = "最近一小时报警次数"
+    
+    def __init__(self, fleet: KaadasFleetStats) -> None:
+        """初始化传感器"""
+        super().__init__(fleet, "alarms_last_hour")
+        
+    @property
+    def native_value(self) -> int:
+        """返回最近一小时报警次数"""
+        return self.fleet.alarms_last_hour
+
+class KaadasFleetUnlocksTodaySensor(KaadasFleetSensor):
+    """今日开锁次数传感器"""
+    
+    _attr_name = "今日开锁次数"
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    
+    def __init__(self, fleet: KaadasFleetStats) -> None:
+        """初始化传感器"""
+        super().__init__(fleet, "unlocks_today")
+        
+    @property
+    def native_value(self) -> int:
+        """返回全部映射用户今日开锁总次数"""
+        return sum(self.fleet.unlocks_today.values())
+        
+    @property
+    def extra_state_attributes(self) -> dict:
+        """返回各用户今日开锁次数"""
+        return dict(self.fleet.unlocks_today)
@@ -0,0 +1,95 @@
+"""凯迪仕门锁状态机"""
+
+from typing import Dict, FrozenSet, Optional, Tuple
+
+from .const import UNLOCK_OPERATION_TYPES, RESULT_FAILURE
+from .records import KaadasRecord
+
+# 锁舌状态
+BOLT_LOCKED = "locked"
+BOLT_UNLOCKED = "unlocked"
+BOLT_DEADBOLTED = "deadbolted"
+
+# 状态维度
+FIELD_BOLT = "bolt"
+FIELD_CHILD_LOCK = "child_lock"
+FIELD_ALARM = "alarm"
+
+# 操作类型 -> 触发的状态变化 (维度, 新值)
+TRANSITIONS: Dict[int, Tuple[Tuple[str, object], ...]] = {
+    **{operation_type: ((FIELD_BOLT, BOLT_UNLOCKED),) for operation_type in UNLOCK_OPERATION_TYPES},
+    6: ((FIELD_BOLT, BOLT_LOCKED),),  # 自动上锁
+    7: ((FIELD_BOLT, BOLT_UNLOCKED), (FIELD_ALARM, 7)),  # 胁迫指纹开锁
+    8: ((FIELD_CHILD_LOCK, True),),  # 童锁
+    9: ((FIELD_BOLT, BOLT_DEADBOLTED),),  # 上提反锁
+    10: ((FIELD_ALARM, 10),),  # 门未关报警
+    11: ((FIELD_ALARM, 11),),  # 撬锁报警
+    12: ((FIELD_ALARM, 12),),  # 试错报警
+    25: ((FIELD_ALARM, None),),  # 报警解除
+    26: ((FIELD_BOLT, BOLT_DEADBOLTED),),  # 防猫眼锁定
+    27: ((FIELD_BOLT, BOLT_LOCKED),),  # 防猫眼解锁，门仍处于上锁状态
+    28: ((FIELD_CHILD_LOCK, True),),  # 童锁锁定
+    29: ((FIELD_CHILD_LOCK, False),),  # 童锁解锁
+}
+
+def bolt_operation_types(*states: str) -> FrozenSet[int]:
+    """返回使锁舌进入指定状态之一的操作类型"""
+    return frozenset(
+        operation_type
+        for operation_type, transitions in TRANSITIONS.items()
+        for field, value in transitions
+        if field == FIELD_BOLT and value in states
+    )
+
+class KaadasLockStateMachine:
+    """由有序记录驱动的门锁状态机
+
+    分别跟踪锁舌、童锁与报警三个维度及各自的进入时间，每条记录 O(1) 更新。
+    """
+
+    __slots__ = (
+        "bolt",
+        "bolt_since",
+        "child_lock",
+        "child_lock_since",
+        "alarm",
+        "alarm_since",
+        "last_timestamp",
+    )
+
+    def __init__(self) -> None:
+        """初始化为未知状态"""
+        self.bolt: Optional[str] = None
+        self.bolt_since = 0
+        self.child_lock: Optional[bool] = None
+        self.child_lock_since = 0
+        # 当前报警的操作类型，None 表示无报警
+        self.alarm: Optional[int] = None
+        self.alarm_since = 0
+        self.last_timestamp = 0
+
+    def feed(self, record: KaadasRecord) -> bool:
+        """输入一条记录，返回状态是否变化；早于已处理记录的乱序记录被忽略"""
+        if record.timestamp < self.last_timestamp:
+            return False
+        self.last_timestamp = record.timestamp
+
+        transitions = TRANSITIONS.get(record.operation_type)
+        # 失败的操作(如指纹开锁失败)不改变门锁状态
+        if transitions is None or record.operation_result == RESULT_FAILURE:
+            return False
+
+        changed = False
+        for field, value in transitions:
+            if getattr(self, field) != value:
+                setattr(self, field, value)
+                setattr(self, f"{field}_since", record.timestamp)
+                changed = True
+        return changed
+
+    @property
+    def is_locked(self) -> Optional[bool]:
+        """锁舌是否处于上锁(含反锁)状态，未知时返回 None"""
+        if self.bolt is None:
+            return None
+        return self.bolt != BOLT_UNLOCKED
@@ -0,0 +1,26 @@
+"""测试公共配置
+
+仓库根目录即集成包本身。安装了 Home Assistant 时按完整包导入；
+否则与 cli.py 相同，只注册包路径，使不依赖 Home Assistant 的模块可以单独导入。
+"""
+
+import importlib.util
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE = "kaadas_lock"
+
+if PACKAGE not in sys.modules:
+    if importlib.util.find_spec("homeassistant") is not None:
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE, os.path.join(ROOT, "__init__.py"), submodule_search_locations=[ROOT]
+        )
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE] = module
+        spec.loader.exec_module(module)
+    else:
+        package = types.ModuleType(PACKAGE)
+        package.__path__ = [ROOT]
+        sys.modules[PACKAGE] = package
@@ -0,0 +1,102 @@
+"""可编排的本地故障注入服务
+
+按场景文件中的响应序列依次应答，序列用尽后重复最后一项。每一项可指定:
+
+- status: HTTP 状态码，默认 200
+- delay: 应答前等待的秒数
+- headers: 额外的响应头
+- json: 响应体对象
+- body: 原始响应体字符串(用于截断或非法 JSON)
+- records: 生成包含指定条数记录的正常状态响应
+- repeat: 该项重复的次数
+"""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from aiohttp import web
+
+def make_status(record_count: int, battery: int = 80, newest: int = 1_700_000_000) -> Dict[str, Any]:
+    """构建正常的门锁状态响应，记录按时间从新到旧排列"""
+    return {
+        "code": 0,
+        "data": {
+            "battery": battery,
+            "recordList": [
+                {
+                    "operationTime": newest - index,
+                    "operationType": 1 + index % 5,
+                    "operationResult": 1,
+                    "userName": f"user{index % 8}",
+                }
+                for index in range(record_count)
+            ],
+        },
+    }
+
+class FaultServer:
+    """按响应序列应答 POST 请求的本地服务"""
+
+    def __init__(self, responses: List[Dict[str, Any]]) -> None:
+        """初始化服务并预先编码全部响应体"""
+        self.responses = []
+        for response in responses:
+            prepared = self._prepare(response)
+            self.responses.extend([prepared] * response.get("repeat", 1))
+        self.requests: Counter = Counter()
+        self.base_url = ""
+        self._runner: Optional[web.AppRunner] = None
+
+    @staticmethod
+    def _prepare(response: Dict[str, Any]) -> Dict[str, Any]:
+        """计算响应体，避免在测量期间生成"""
+        if "body" in response:
+            body = response["body"].encode()
+        elif "json" in response:
+            body = json.dumps(response["json"]).encode()
+        else:
+            body = json.dumps(make_status(response.get("records", 1))).encode()
+        return {
+            "status": response.get("status", 200),
+            "delay": response.get("delay", 0),
+            "headers": response.get("headers", {}),
+            "body": body,
+        }
+
+    @property
+    def total_requests(self) -> int:
+        """返回收到的请求总数"""
+        return sum(self.requests.values())
+
+    async def __aenter__(self) -> "FaultServer":
+        """在随机端口启动服务"""
+        app = web.Application()
+        app.router.add_post("/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, shutdown_timeout=0.1)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        self.base_url = f"http://127.0.0.1:{port}"
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """停止服务"""
+        await self._runner.cleanup()
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        """按序列应答"""
+        path = request.match_info["path"]
+        index = self.total_requests
+        self.requests[path] += 1
+        response = self.responses[min(index, len(self.responses) - 1)]
+        if response["delay"]:
+            await asyncio.sleep(response["delay"])
+        return web.Response(
+            status=response["status"],
+            body=response["body"],
+            headers=response["headers"],
+            content_type="application/json",
+        )
@@ -0,0 +1,27 @@
+"""异常检测的用户统计"""
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from kaadas_lock.anomaly import KaadasAnomalyDetector
+from kaadas_lock.records import KaadasRecord
+
+DAY = 86400
+START = 1_700_006_400  # 某周一 0 点(UTC)
+
+def test_same_user_name_on_different_locks_is_tracked_separately() -> None:
+    """用户统计按门锁区分：一把门锁上的历史不会用于另一把门锁上的同名用户"""
+    detector = KaadasAnomalyDetector(None)
+    history = [("SN_A", KaadasRecord(START + day * DAY + 8 * 3600, 1, 1, "妈妈")) for day in range(70)]
+    detector.process(history, 0, START)
+
+    night = START + 70 * DAY + 3 * 3600
+    now = night + 60
+    anomalies = detector.process(
+        [("SN_A", KaadasRecord(night, 1, 1, "妈妈")), ("SN_B", KaadasRecord(night + 1, 1, 1, "妈妈"))], 0, now
+    )
+
+    # 门锁 A 的用户凌晨开锁偏离其习惯；门锁 B 的同名用户没有历史，不参与评分
+    assert [anomaly["wifi_sn"] for anomaly in anomalies] == ["SN_A"]
+    assert len(detector._users) == 2
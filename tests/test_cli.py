@@ -0,0 +1,58 @@
+"""命令行工具的断点续传"""
+
+import json
+
+from kaadas_lock.cli import Checkpoint, EventWriter, recover_output
+from kaadas_lock.records import KaadasRecord, KaadasRecordBuffer
+
+WIFI_SN = "SN0001"
+
+def make_records(start: int, count: int):
+    """构建按时间递增的开锁记录"""
+    return [KaadasRecord(start + index, 1, 1, "user") for index in range(count)]
+
+def emit(writer: EventWriter, buffer: KaadasRecordBuffer, records) -> None:
+    """与 async_poll_lock 相同地写入新增记录"""
+    writer.write([{"wifi_sn": WIFI_SN, **record.as_dict()} for record in buffer.ingest(records)])
+
+def resume(checkpoint_path: str, output_path: str) -> KaadasRecordBuffer:
+    """按重启后的流程恢复去重位置"""
+    checkpoint = Checkpoint(checkpoint_path)
+    buffer = KaadasRecordBuffer()
+    buffer.restore(checkpoint.locks.get(WIFI_SN, {}))
+    recover_output(output_path, checkpoint.output, {WIFI_SN: buffer})
+    return buffer
+
+def test_crash_between_output_and_checkpoint(tmp_path) -> None:
+    """写入输出后、保存检查点前崩溃，重启后不重复输出"""
+    output_path = str(tmp_path / "events.ndjson")
+    checkpoint_path = str(tmp_path / "state.json")
+    writer = EventWriter(output_path, 10**6, 2)
+    buffer = KaadasRecordBuffer()
+
+    emit(writer, buffer, make_records(1000, 5))
+    Checkpoint(checkpoint_path).save({WIFI_SN: buffer}, writer.position)
+    # 第二批写入输出后未保存检查点即崩溃
+    emit(writer, buffer, make_records(1005, 5))
+    writer.close()
+
+    resumed = resume(checkpoint_path, output_path)
+    assert resumed.ingest(make_records(1000, 10)) == []
+    assert [record.timestamp for record in resumed.ingest(make_records(1000, 11))] == [1010]
+
+def test_recovery_across_rotation(tmp_path) -> None:
+    """检查点之后输出文件发生轮转时，从轮转出的文件与新文件中恢复"""
+    output_path = str(tmp_path / "events.ndjson")
+    checkpoint_path = str(tmp_path / "state.json")
+    line_size = len(json.dumps({"wifi_sn": WIFI_SN, **make_records(1000, 1)[0].as_dict()}, ensure_ascii=False)) + 1
+    writer = EventWriter(output_path, line_size * 6, 2)
+    buffer = KaadasRecordBuffer()
+
+    emit(writer, buffer, make_records(1000, 5))
+    Checkpoint(checkpoint_path).save({WIFI_SN: buffer}, writer.position)
+    emit(writer, buffer, make_records(1005, 5))
+    writer.close()
+    assert (tmp_path / "events.ndjson.1").exists()
+
+    resumed = resume(checkpoint_path, output_path)
+    assert resumed.ingest(make_records(1000, 10)) == []
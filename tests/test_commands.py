@@ -0,0 +1,78 @@
+"""命令确认记录类型与命令队列顺序"""
+
+import asyncio
+from types import SimpleNamespace
+
+from kaadas_lock import commands
+from kaadas_lock.commands import COMMAND_CONFIRM_TYPES, KaadasCommandQueue
+from kaadas_lock.const import COMMAND_LOCK, COMMAND_UNLOCK, METRIC_COMMANDS_COALESCED
+from kaadas_lock.records import KaadasRecordBuffer
+
+def test_confirm_types_follow_bolt_transitions() -> None:
+    """只有改变锁舌状态的记录才能确认命令，童锁记录不能确认上锁"""
+    assert 28 not in COMMAND_CONFIRM_TYPES[COMMAND_LOCK]
+    assert 8 not in COMMAND_CONFIRM_TYPES[COMMAND_LOCK]
+    assert {6, 9} <= COMMAND_CONFIRM_TYPES[COMMAND_LOCK]
+    assert {1, 2, 3, 4, 5} <= COMMAND_CONFIRM_TYPES[COMMAND_UNLOCK]
+    assert not COMMAND_CONFIRM_TYPES[COMMAND_LOCK] & COMMAND_CONFIRM_TYPES[COMMAND_UNLOCK]
+
+class FakeAPI:
+    """记录下发顺序的接口，每条命令耗时一个事件循环步骤"""
+
+    def __init__(self) -> None:
+        self.sent = []
+
+    async def async_lock(self) -> None:
+        self.sent.append(COMMAND_LOCK)
+        await asyncio.sleep(0)
+
+    async def async_unlock(self) -> None:
+        self.sent.append(COMMAND_UNLOCK)
+        await asyncio.sleep(0)
+
+class FakeCoordinator:
+    """只提供命令队列所需属性的协调器"""
+
+    def __init__(self) -> None:
+        self.hass = SimpleNamespace(async_create_task=asyncio.ensure_future)
+        self.api = FakeAPI()
+        self.records = KaadasRecordBuffer()
+
+    async def async_refresh(self) -> None:
+        """确认轮询不产生新记录"""
+
+def test_opposite_command_between_is_not_coalesced(monkeypatch) -> None:
+    """执行中依次提交开锁、上锁、开锁，按提交顺序下发，最后执行的是开锁"""
+    monkeypatch.setattr(commands, "CONFIRM_POLL_INTERVAL", 0)
+    monkeypatch.setattr(commands, "CONFIRM_POLL_ATTEMPTS", 1)
+
+    async def run():
+        coordinator = FakeCoordinator()
+        queue = KaadasCommandQueue(coordinator)
+        running = asyncio.ensure_future(queue.async_submit(COMMAND_LOCK))
+        await asyncio.sleep(0)
+        submitted = [queue.async_submit(command) for command in (COMMAND_UNLOCK, COMMAND_LOCK, COMMAND_UNLOCK)]
+        await asyncio.gather(running, *submitted)
+        return coordinator.api.sent, queue.metrics[METRIC_COMMANDS_COALESCED]
+
+    sent, coalesced = asyncio.run(run())
+    assert sent == [COMMAND_LOCK, COMMAND_UNLOCK, COMMAND_LOCK, COMMAND_UNLOCK]
+    assert coalesced == 0
+
+def test_repeated_tail_command_is_coalesced(monkeypatch) -> None:
+    """与队尾相同的命令合并为一次下发"""
+    monkeypatch.setattr(commands, "CONFIRM_POLL_INTERVAL", 0)
+    monkeypatch.setattr(commands, "CONFIRM_POLL_ATTEMPTS", 1)
+
+    async def run():
+        coordinator = FakeCoordinator()
+        queue = KaadasCommandQueue(coordinator)
+        running = asyncio.ensure_future(queue.async_submit(COMMAND_LOCK))
+        await asyncio.sleep(0)
+        submitted = [queue.async_submit(command) for command in (COMMAND_UNLOCK, COMMAND_UNLOCK)]
+        await asyncio.gather(running, *submitted)
+        return coordinator.api.sent, queue.metrics[METRIC_COMMANDS_COALESCED]
+
+    sent, coalesced = asyncio.run(run())
+    assert sent == [COMMAND_LOCK, COMMAND_UNLOCK]
+    assert coalesced == 1
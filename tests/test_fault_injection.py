@@ -0,0 +1,117 @@
+"""在故障注入服务下验证 API 客户端与协调器的行为
+
+每个场景文件描述服务的响应序列与预期，轮询次数等于 expect.ok 的长度。
+"""
+
+import asyncio
+import gc
+import glob
+import json
+import os
+import time
+import tracemalloc
+from typing import Any, Dict, List
+
+import aiohttp
+import pytest
+
+from fault_server import FaultServer
+from kaadas_lock.kaadas_api import KaadasAPI
+from kaadas_lock.records import KaadasRecordBuffer
+
+SCENARIO_DIR = os.path.join(os.path.dirname(__file__), "scenarios")
+SCENARIOS = sorted(glob.glob(os.path.join(SCENARIO_DIR, "*.json")))
+
+DEFAULT_TIMEOUT = 1.0  # 请求超时(秒)
+DEFAULT_MAX_RETAINED_KB = 256  # 轮询结束后保留的内存上限
+DEFAULT_MAX_PEAK_MB = 16  # 轮询期间的内存峰值上限
+
+def load_scenario(path: str) -> Dict[str, Any]:
+    """读取场景文件"""
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+async def run_scenario(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """按场景轮询，并按协调器的方式写入记录缓冲区"""
+    timeout = scenario.get("timeout", DEFAULT_TIMEOUT)
+    polls = len(scenario["expect"]["ok"])
+    ok: List[bool] = []
+    latencies: List[float] = []
+
+    async with FaultServer(scenario["responses"]) as server, aiohttp.ClientSession() as session:
+        api = KaadasAPI("token", "SN0001", "uid", base_url=server.base_url, session=session, timeout=timeout)
+        buffer = KaadasRecordBuffer()
+
+        gc.collect()
+        tracemalloc.start()
+        baseline, _ = tracemalloc.get_traced_memory()
+        for _ in range(polls):
+            started = time.monotonic()
+            status = await api.async_get_lock_status()
+            latencies.append(time.monotonic() - started)
+            ok.append(api.last_request_ok)
+            if api.last_request_ok:
+                buffer.ingest(status.pop("records", ()))
+        del status
+        gc.collect()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "ok": ok,
+            "latencies": latencies,
+            "requests": server.total_requests,
+            "errors": api.metrics["errors"],
+            "records": len(buffer),
+            "retained": current - baseline,
+            "peak": peak - baseline,
+        }
+
+@pytest.mark.parametrize("path", SCENARIOS, ids=lambda path: os.path.splitext(os.path.basename(path))[0])
+def test_scenario(path: str) -> None:
+    """场景下的可用性、请求数、耗时与内存"""
+    scenario = load_scenario(path)
+    expect = scenario["expect"]
+    result = asyncio.run(run_scenario(scenario))
+
+    # 可用性：失败的轮询必须被识别，恢复后立即可用
+    assert result["ok"] == expect["ok"]
+    assert result["errors"] == expect["ok"].count(False)
+    # 请求数：每次轮询只发一个请求，失败时不重试放大
+    assert result["requests"] == len(expect["ok"])
+    # 耗时：慢响应按超时返回
+    max_latency = expect.get("max_latency", scenario.get("timeout", DEFAULT_TIMEOUT) + 0.5)
+    assert max(result["latencies"]) <= max_latency
+    # 内存：只保留预算内的记录
+    assert result["retained"] <= expect.get("max_retained_kb", DEFAULT_MAX_RETAINED_KB) * 1024
+    assert result["peak"] <= expect.get("max_peak_mb", DEFAULT_MAX_PEAK_MB) * 1024 * 1024
+    if "records" in expect:
+        assert result["records"] == expect["records"]
+
+def test_coordinator_availability_follows_faults(tmp_path) -> None:
+    """协调器在请求失败时标记为不可用，并保留上一次的数据"""
+    pytest.importorskip("homeassistant")
+    from homeassistant.core import HomeAssistant
+    from kaadas_lock import KaadasDataUpdateCoordinator
+    from kaadas_lock.const import DATA_KEY_STATUS
+
+    scenario = load_scenario(os.path.join(SCENARIO_DIR, "flapping.json"))
+
+    async def run() -> List[bool]:
+        hass = HomeAssistant(str(tmp_path))
+        available = []
+        try:
+            async with FaultServer(scenario["responses"]) as server, aiohttp.ClientSession() as session:
+                api = KaadasAPI("token", "SN0001", "uid", base_url=server.base_url, session=session)
+                coordinator = KaadasDataUpdateCoordinator(hass, api)
+                for _ in scenario["expect"]["ok"]:
+                    await coordinator.async_refresh()
+                    available.append(coordinator.last_update_success)
+                    if coordinator.data is not None:
+                        assert coordinator.data[DATA_KEY_STATUS]["battery"] == 80
+                coordinator.anomaly.async_shutdown()
+        finally:
+            await hass.async_stop(force=True)
+        return available
+
+    assert asyncio.run(run()) == scenario["expect"]["ok"]
@@ -0,0 +1,84 @@
+"""记录缓冲区的内存预算与时间解析"""
+
+import gc
+import tracemalloc
+from datetime import timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from kaadas_lock.const import RECORD_BUDGET_BYTES
+from kaadas_lock.records import KaadasRecord, KaadasRecordBuffer, parse_timestamp
+
+LOCKS = 1000
+USERS_PER_LOCK = 8
+BATCHES = 4
+BATCH_SIZE = 100
+
+def make_batch(lock: int, batch: int):
+    """构建一批记录，用户名为每把门锁各不相同的手机号"""
+    return [
+        KaadasRecord(
+            1_700_000_000 + batch * BATCH_SIZE + index,
+            1 + index % 5,
+            1,
+            f"138{lock:05d}{index % USERS_PER_LOCK:03d}",
+        )
+        for index in range(BATCH_SIZE)
+    ]
+
+def test_budget_holds_at_1000_locks() -> None:
+    """1000 把门锁写满缓冲区后，每把门锁的实际内存不超过预算"""
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    buffers = []
+    for lock in range(LOCKS):
+        buffer = KaadasRecordBuffer()
+        for batch in range(BATCHES):
+            buffer.ingest(make_batch(lock, batch))
+        buffers.append(buffer)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    assert (current - baseline) / LOCKS <= RECORD_BUDGET_BYTES
+    for buffer in buffers:
+        assert buffer.used_bytes <= RECORD_BUDGET_BYTES
+        # 淘汰的是最旧的记录
+        assert buffer.latest.timestamp == 1_700_000_000 + BATCHES * BATCH_SIZE - 1
+
+def test_distinct_user_names_count_against_budget() -> None:
+    """用户名越长、越多，保留的记录越少"""
+    short = KaadasRecordBuffer()
+    short.ingest(KaadasRecord(1_700_000_000 + index, 1, 1, "u") for index in range(1000))
+    distinct = KaadasRecordBuffer()
+    distinct.ingest(KaadasRecord(1_700_000_000 + index, 1, 1, f"user-{index:04d}" * 4) for index in range(1000))
+
+    assert len(distinct) < len(short)
+    assert distinct.used_bytes <= RECORD_BUDGET_BYTES
+
+def test_naive_time_uses_given_time_zone() -> None:
+    """不带时区的操作时间按指定时区解释"""
+    shanghai = parse_timestamp("2024-01-01 08:00:00", ZoneInfo("Asia/Shanghai"))
+    utc = parse_timestamp("2024-01-01 08:00:00", timezone.utc)
+
+    assert utc == 1_704_096_000
+    assert utc - shanghai == timedelta(hours=8).total_seconds()
+    # 数值时间戳不受时区影响
+    assert parse_timestamp(1_704_096_000_000, ZoneInfo("Asia/Shanghai")) == 1_704_096_000
+
+def test_coverage_restarts_after_gap() -> None:
+    """与已有记录不衔接的批次之前可能有遗漏，完整范围从该批次开始"""
+    buffer = KaadasRecordBuffer()
+    buffer.ingest(KaadasRecord(timestamp, 1, 1, "user") for timestamp in range(100, 110))
+    buffer.ingest(KaadasRecord(timestamp, 1, 1, "user") for timestamp in range(105, 115))
+    assert buffer.coverage == (100, 114)
+
+    # 轮询中断期间的记录超出了接口返回的条数
+    buffer.ingest(KaadasRecord(timestamp, 1, 1, "user") for timestamp in range(130, 140))
+    assert buffer.coverage == (130, 139)
+
+def test_coverage_excludes_evicted_records() -> None:
+    """淘汰的记录不再计入完整范围"""
+    buffer = KaadasRecordBuffer()
+    buffer.ingest(KaadasRecord(1_700_000_000 + index, 1, 1, "user") for index in range(1000))
+    assert buffer.coverage == (next(iter(buffer)).timestamp, 1_700_000_999)
@@ -0,0 +1,41 @@
+"""门锁状态机"""
+
+from kaadas_lock.records import KaadasRecord
+from kaadas_lock.state_machine import BOLT_DEADBOLTED, BOLT_UNLOCKED, KaadasLockStateMachine
+
+def test_failed_unlock_does_not_unlock() -> None:
+    """开锁失败的记录不改变锁舌状态"""
+    machine = KaadasLockStateMachine()
+    assert machine.feed(KaadasRecord(100, 6, 1, ""))
+    assert not machine.feed(KaadasRecord(110, 1, 2, "user"))
+    assert machine.is_locked is True
+    assert machine.bolt_since == 100
+
+def test_deadbolt_counts_as_locked() -> None:
+    """上提反锁进入反锁状态，并记录进入时间"""
+    machine = KaadasLockStateMachine()
+    machine.feed(KaadasRecord(100, 1, 1, "user"))
+    assert machine.bolt == BOLT_UNLOCKED
+    machine.feed(KaadasRecord(200, 9, 1, "user"))
+    assert machine.bolt == BOLT_DEADBOLTED
+    assert machine.is_locked is True
+    assert machine.bolt_since == 200
+
+def test_child_lock_and_alarm_are_independent() -> None:
+    """童锁与报警单独跟踪，不影响锁舌状态"""
+    machine = KaadasLockStateMachine()
+    machine.feed(KaadasRecord(100, 1, 1, "user"))
+    machine.feed(KaadasRecord(110, 28, 1, ""))
+    machine.feed(KaadasRecord(120, 11, 1, ""))
+    assert machine.bolt == BOLT_UNLOCKED
+    assert (machine.child_lock, machine.child_lock_since) == (True, 110)
+    assert (machine.alarm, machine.alarm_since) == (11, 120)
+    machine.feed(KaadasRecord(130, 25, 1, ""))
+    assert machine.alarm is None
+
+def test_out_of_order_records_are_ignored() -> None:
+    """早于已处理记录的记录不改变状态"""
+    machine = KaadasLockStateMachine()
+    machine.feed(KaadasRecord(200, 6, 1, ""))
+    assert not machine.feed(KaadasRecord(100, 1, 1, "user"))
+    assert machine.is_locked is True
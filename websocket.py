@@ -0,0 +1,189 @@
+"""凯迪仕门锁 WebSocket 接口"""
+
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+
+import voluptuous as vol
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+from .const import DOMAIN, SIGNAL_NEW_RECORDS, WS_BACKLOG_PAGE_SIZE, WS_MAX_PENDING
+from .records import KaadasRecord
+
+_LOGGER = logging.getLogger(__name__)
+
+# hass.data 中的订阅表，键为 (id(connection), 订阅消息 id)
+DATA_WS_SUBSCRIPTIONS = f"{DOMAIN}_ws_subscriptions"
+
+@callback
+def async_register_websocket_commands(hass: HomeAssistant) -> None:
+    """注册 WebSocket 命令"""
+    websocket_api.async_register_command(hass, websocket_subscribe_events)
+    websocket_api.async_register_command(hass, websocket_ack_events)
+
+class EventFilter:
+    """服务端事件过滤条件"""
+
+    def __init__(self, msg: Dict[str, Any]) -> None:
+        """从订阅消息初始化过滤条件，未指定的条件不过滤"""
+        self.wifi_sns = set(msg.get("wifi_sn", ())) or None
+        self.users = set(msg.get("user", ())) or None
+        self.operation_types = set(msg.get("operation_type", ())) or None
+        self.since = msg.get("since", 0)
+
+    def matches(self, wifi_sn: str, record: KaadasRecord) -> bool:
+        """记录是否满足过滤条件"""
+        return (
+            record.timestamp >= self.since
+            and (self.wifi_sns is None or wifi_sn in self.wifi_sns)
+            and (self.users is None or record.user in self.users)
+            and (self.operation_types is None or record.operation_type in self.operation_types)
+        )
+
+def _event(wifi_sn: str, record: KaadasRecord) -> Dict[str, Any]:
+    """构建推送给客户端的事件"""
+    return {"wifi_sn": wifi_sn, **record.as_dict()}
+
+class EventSubscription:
+    """单个订阅的发送状态
+
+    每条推送都需客户端确认后才发送下一条：先逐页发送历史记录，再发送一条历史结束标记，
+    之后每次最多发送 page_size 条实时事件。等待确认期间实时事件缓存在有界队列中，
+    队列满时丢弃最旧的事件，丢弃数随下一条推送报告。
+    """
+
+    def __init__(
+        self,
+        connection: websocket_api.ActiveConnection,
+        msg_id: int,
+        page_size: int,
+        backlog: List[Tuple[str, KaadasRecord]],
+    ) -> None:
+        """初始化订阅"""
+        self.connection = connection
+        self.msg_id = msg_id
+        self.page_size = page_size
+        self._backlog: Deque[Tuple[str, KaadasRecord]] = deque(backlog)
+        self._backlog_done = False
+        self._pending: Deque[Dict[str, Any]] = deque(maxlen=WS_MAX_PENDING)
+        self._dropped = 0
+        self._awaiting_ack = False
+
+    @callback
+    def async_add(self, events: List[Dict[str, Any]]) -> None:
+        """缓存实时事件，客户端空闲时立即发送"""
+        for event in events:
+            if len(self._pending) == self._pending.maxlen:
+                self._dropped += 1
+            self._pending.append(event)
+        self.async_send_next()
+
+    @callback
+    def async_ack(self) -> None:
+        """客户端确认上一条推送"""
+        self._awaiting_ack = False
+        self.async_send_next()
+
+    @callback
+    def async_send_next(self) -> None:
+        """未在等待确认时发送下一条推送"""
+        if self._awaiting_ack:
+            return
+
+        if self._backlog:
+            count = min(self.page_size, len(self._backlog))
+            events = [_event(*self._backlog.popleft()) for _ in range(count)]
+            message = {"backlog": True, "events": events}
+        elif not self._backlog_done:
+            self._backlog_done = True
+            message = {"backlog": False, "events": []}
+        elif self._pending:
+            count = min(self.page_size, len(self._pending))
+            message = {"backlog": False, "events": [self._pending.popleft() for _ in range(count)]}
+            if self._dropped:
+                message["dropped"] = self._dropped
+                self._dropped = 0
+        else:
+            return
+
+        self._awaiting_ack = True
+        self.connection.send_message(websocket_api.event_message(self.msg_id, message))
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/subscribe_events",
+        vol.Optional("wifi_sn"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("user"): vol.All(cv.ensure_list, [cv.string]),
+        vol.Optional("operation_type"): vol.All(cv.ensure_list, [vol.Coerce(int)]),
+        vol.Optional("since"): vol.Coerce(int),
+        vol.Optional("page_size", default=WS_BACKLOG_PAGE_SIZE): vol.All(
+            vol.Coerce(int), vol.Range(min=1, max=1000)
+        ),
+    }
+)
+@callback
+def websocket_subscribe_events(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """订阅门锁事件：先分页推送已保留的历史记录，再推送实时事件
+
+    客户端收到每条推送后需发送 kaadas_lock/ack_events 确认，服务端收到确认后才发送下一条。
+    """
+    msg_id = msg["id"]
+    event_filter = EventFilter(msg)
+    subscriptions = hass.data.setdefault(DATA_WS_SUBSCRIPTIONS, {})
+    key = (id(connection), msg_id)
+
+    @callback
+    def async_handle_records(wifi_sn: str, records: List[KaadasRecord]) -> None:
+        """缓存满足条件的新记录"""
+        events = [_event(wifi_sn, record) for record in records if event_filter.matches(wifi_sn, record)]
+        if events:
+            subscription.async_add(events)
+
+    # 在同一事件循环步骤中订阅并截取历史快照，保证历史与实时事件之间不重不漏
+    unsub = async_dispatcher_connect(hass, SIGNAL_NEW_RECORDS, async_handle_records)
+    backlog: List[Tuple[str, KaadasRecord]] = sorted(
+        (
+            (coordinator.api.wifi_sn, record)
+            for coordinator in hass.data.get(DOMAIN, {}).values()
+            if isinstance(coordinator, DataUpdateCoordinator)
+            for record in coordinator.records
+            if event_filter.matches(coordinator.api.wifi_sn, record)
+        ),
+        key=lambda item: item[1].timestamp,
+    )
+    subscription = subscriptions[key] = EventSubscription(connection, msg_id, msg["page_size"], backlog)
+
+    @callback
+    def async_unsubscribe() -> None:
+        """取消订阅"""
+        unsub()
+        subscriptions.pop(key, None)
+
+    connection.subscriptions[msg_id] = async_unsubscribe
+    connection.send_result(msg_id)
+    subscription.async_send_next()
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): f"{DOMAIN}/ack_events",
+        vol.Required("subscription"): cv.positive_int,
+    }
+)
+@callback
+def websocket_ack_events(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: Dict[str, Any]
+) -> None:
+    """确认收到订阅的上一条推送，服务端随后发送下一条"""
+    subscription = hass.data.get(DATA_WS_SUBSCRIPTIONS, {}).get((id(connection), msg["subscription"]))
+    if subscription is None:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "订阅不存在")
+        return
+
+    subscription.async_ack()
+    connection.send_result(msg["id"])